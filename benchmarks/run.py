@@ -0,0 +1,256 @@
+"""Offline benchmark for Mediarr sensor updates.
+
+Starts local stub servers for every upstream, sets up the sensors through the
+regular platform setup, and drives their updates. Reports wall time, upstream
+requests per host, peak Python memory and event loop blocking for setup, a
+cold first update and warm follow-up updates.
+
+Requires Home Assistant to be installed:
+
+    python benchmarks/run.py --size 500 --latency 0.02 --rounds 3
+    python benchmarks/run.py --backends plex jellyfin --error-rate 0.05 --json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from mediarr import sensor as mediarr_sensor  # noqa: E402
+from mediarr.common import tmdb_api  # noqa: E402
+from mediarr.discovery import trakt  # noqa: E402
+from stub_servers import UPSTREAMS, StubOptions  # noqa: E402
+
+BACKENDS = ("plex", "jellyfin", "sonarr", "radarr", "tmdb", "trakt")
+
+# Lag beyond this is counted as the event loop being blocked
+LOOP_LAG_THRESHOLD = 0.01
+
+
+class LoopMonitor:
+    """Measure how late the event loop wakes up a periodic sleeper."""
+
+    def __init__(self, interval=0.005):
+        """Initialize the monitor."""
+        self._interval = interval
+        self._task = None
+        self.max_lag = 0.0
+        self.blocked = 0.0
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self._interval)
+            lag = loop.time() - started - self._interval
+            self.max_lag = max(self.max_lag, lag)
+            if lag > LOOP_LAG_THRESHOLD:
+                self.blocked += lag
+
+    def reset(self):
+        """Reset the counters."""
+        self.max_lag = 0.0
+        self.blocked = 0.0
+
+    def start(self):
+        """Start sampling."""
+        self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self):
+        """Stop sampling."""
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+def _build_config(backend, upstreams, max_items):
+    """Return the platform configuration for one backend."""
+    tmdb_api_key = "benchmark"
+    if backend == "plex":
+        host, port = upstreams["plex"].url.rsplit(":", 1)
+        return {"plex": {
+            "host": host, "port": int(port), "token": "benchmark",
+            "tmdb_api_key": tmdb_api_key, "max_items": max_items,
+        }}
+    if backend == "jellyfin":
+        host, port = upstreams["jellyfin"].url[len("http://"):].rsplit(":", 1)
+        return {"jellyfin": {
+            "host": host, "port": int(port), "token": "benchmark",
+            "tmdb_api_key": tmdb_api_key, "max_items": max_items,
+        }}
+    if backend in ("sonarr", "radarr"):
+        return {backend: {
+            "url": upstreams[backend].url, "api_key": "benchmark",
+            "tmdb_api_key": tmdb_api_key, "max_items": max_items,
+            "cf_client_id": "", "cf_client_secret": "",
+        }}
+    if backend == "trakt":
+        return {"trakt": {
+            "client_id": "benchmark", "client_secret": "benchmark",
+            "trending_type": "both", "tmdb_api_key": tmdb_api_key, "max_items": max_items,
+        }}
+    return {"tmdb": {
+        "tmdb_api_key": tmdb_api_key, "max_items": max_items,
+        "trending": True, "now_playing": True, "upcoming": True,
+        "on_air": True, "airing_today": True,
+    }}
+
+
+def _create_hass(config_dir):
+    try:
+        return HomeAssistant(config_dir)
+    except TypeError:
+        # Releases before 2024.2 take no arguments
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+        return hass
+
+
+@contextmanager
+def _measure(upstreams, monitor, result):
+    """Record wall time, per host requests, peak memory and loop lag of a phase."""
+    before = {name: upstream.stats.snapshot() for name, upstream in upstreams.items()}
+    monitor.reset()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    yield
+    result['wall_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    result['peak_kib'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    result['loop_max_lag_ms'] = round(monitor.max_lag * 1000, 1)
+    result['loop_blocked_ms'] = round(monitor.blocked * 1000, 1)
+    result['requests'] = {}
+    for name, upstream in upstreams.items():
+        after = upstream.stats.snapshot()
+        delta = {key: after[key] - before[name][key] for key in after}
+        if delta['requests']:
+            result['requests'][name] = delta
+
+
+async def _run_backend(backend, options, args, monitor):
+    """Benchmark one backend against fresh upstreams and a fresh Home Assistant."""
+    upstreams = {name: UPSTREAMS[name](options) for name in (backend, "tmdb")}
+    for upstream in upstreams.values():
+        await upstream.async_start()
+
+    tmdb_api.TMDB_BASE_URL = f"{upstreams['tmdb'].url}/3"
+    if "trakt" in upstreams:
+        trakt.TRAKT_API_URL = upstreams["trakt"].url
+
+    phases = []
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = _create_hass(config_dir)
+        try:
+            sensors = []
+            config = _build_config(backend, upstreams, args.max_items)
+            config["image_proxy"] = False
+
+            setup = {'phase': 'setup'}
+            with _measure(upstreams, monitor, setup):
+                await mediarr_sensor.async_setup_platform(
+                    hass, config, lambda entities, update=False: sensors.extend(entities)
+                )
+            setup['sensors'] = len(sensors)
+            phases.append(setup)
+            for sensor in sensors:
+                sensor.hass = hass
+
+            for round_number in range(args.rounds):
+                result = {'phase': 'cold' if round_number == 0 else f"warm {round_number}"}
+                with _measure(upstreams, monitor, result):
+                    if round_number == 0:
+                        await asyncio.gather(*(sensor.async_update() for sensor in sensors))
+                    else:
+                        # Bypass the request debouncer, as a scheduled poll would;
+                        # sensors sharing a coordinator are refreshed once
+                        coordinators = {id(sensor.coordinator): sensor.coordinator for sensor in sensors}
+                        await asyncio.gather(*(
+                            coordinator.async_refresh() for coordinator in coordinators.values()
+                        ))
+                    # Sensors sharing a coordinator may have returned before its
+                    # refresh finished; pick up the result as the listener would
+                    for sensor in sensors:
+                        sensor._apply_coordinator_data()
+                result['items'] = sum(len(sensor.extra_state_attributes.get('data', [])) for sensor in sensors)
+                result['available'] = all(sensor.available for sensor in sensors)
+                phases.append(result)
+        finally:
+            await hass.async_stop(force=True)
+            for upstream in upstreams.values():
+                await upstream.async_stop()
+
+    return phases
+
+
+def _print_report(backend, phases):
+    print(f"\n== {backend}")
+    print(f"{'phase':<8} {'wall ms':>9} {'peak KiB':>9} {'max lag':>8} {'blocked':>8}  requests")
+    for phase in phases:
+        requests = ", ".join(
+            f"{name}={counts['requests']}"
+            + (f" (304: {counts['not_modified']})" if counts['not_modified'] else "")
+            + (f" (err: {counts['errors']})" if counts['errors'] else "")
+            for name, counts in phase['requests'].items()
+        ) or "-"
+        print(
+            f"{phase['phase']:<8} {phase['wall_ms']:>9} {phase['peak_kib']:>9}"
+            f" {phase['loop_max_lag_ms']:>8} {phase['loop_blocked_ms']:>8}  {requests}"
+        )
+
+
+async def _async_main(args):
+    options = StubOptions(
+        size=args.size,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+    )
+    monitor = LoopMonitor()
+    monitor.start()
+    tracemalloc.start()
+    report = {}
+    try:
+        for backend in args.backends:
+            report[backend] = await _run_backend(backend, options, args, monitor)
+    finally:
+        tracemalloc.stop()
+        await monitor.stop()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for backend, phases in report.items():
+            _print_report(backend, phases)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--size", type=int, default=200, help="items in each stub library")
+    parser.add_argument("--max-items", type=int, default=10, help="max_items of each sensor")
+    parser.add_argument("--rounds", type=int, default=3, help="updates per backend, the first one cold")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every upstream response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of upstream requests answered with 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of TMDB requests answered with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show Mediarr log output")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+    asyncio.run(_async_main(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,465 @@
+"""Local aiohttp servers emulating every upstream Mediarr talks to.
+
+Each upstream listens on its own port, so request counts are reported per
+host exactly as they would be against the real services. All payloads are
+generated deterministically from the library size and seed.
+"""
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from xml.sax.saxutils import quoteattr
+from aiohttp import web
+
+GENRES = ["Action", "Comedy", "Drama", "Sci-Fi", "Thriller", "Animation", "Documentary"]
+NETWORKS = ["HBO", "Netflix", "BBC One", "AMC", "FX"]
+
+TMDB_PAGE_SIZE = 20
+IMAGE_SIZE = 64 * 1024
+
+
+@dataclass
+class StubOptions:
+    """Knobs shared by every stub upstream."""
+
+    size: int = 200
+    latency: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    seed: int = 0
+
+
+@dataclass
+class UpstreamStats:
+    """Requests seen by one upstream."""
+
+    requests: int = 0
+    errors: int = 0
+    not_modified: int = 0
+    paths: Counter = field(default_factory=Counter)
+
+    def snapshot(self):
+        """Return a copy of the counters."""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'not_modified': self.not_modified,
+        }
+
+
+def _title(kind, index):
+    return f"{kind} {index:05d}"
+
+
+def _day(offset):
+    return (date.today() + timedelta(days=offset)).isoformat()
+
+
+def _conditional(request, stats, body, content_type):
+    """Answer with 304 when the client already holds this exact body."""
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    if request.headers.get('If-None-Match') == etag:
+        stats.not_modified += 1
+        return web.Response(status=304, headers={'ETag': etag})
+    return web.Response(body=body, content_type=content_type, headers={'ETag': etag})
+
+
+def _json(request, stats, data):
+    return _conditional(request, stats, json.dumps(data).encode(), 'application/json')
+
+
+class StubUpstream:
+    """An aiohttp application with latency and error injection."""
+
+    name = None
+
+    def __init__(self, options):
+        """Initialize the upstream."""
+        self.options = options
+        self.stats = UpstreamStats()
+        self.url = None
+        self._rng = random.Random(f"{options.seed}-{self.name}")
+        self._runner = None
+
+    def routes(self):
+        """Return the routes served by this upstream."""
+        raise NotImplementedError
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        self.stats.requests += 1
+        route = request.match_info.route.resource
+        self.stats.paths[route.canonical if route else request.path] += 1
+        if self.options.latency:
+            await asyncio.sleep(self.options.latency)
+        if self.options.error_rate and self._rng.random() < self.options.error_rate:
+            self.stats.errors += 1
+            return web.Response(status=500, text="injected error")
+        return await handler(request)
+
+    async def async_start(self):
+        """Start listening on a free local port."""
+        app = web.Application(middlewares=[self._middleware])
+        app.add_routes(self.routes())
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, '127.0.0.1', 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    async def async_stop(self):
+        """Stop the server."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class PlexStub(StubUpstream):
+    """Plex Media Server XML API."""
+
+    name = "plex"
+
+    def routes(self):
+        return [
+            web.get('/library/sections', self._sections),
+            web.get('/library/recentlyAdded', self._recently_added),
+            web.get('/library/sections/{section_id}/recentlyAdded', self._recently_added),
+        ]
+
+    async def _sections(self, request):
+        body = (
+            '<MediaContainer size="2">'
+            '<Directory key="1" type="movie" title="Movies"/>'
+            '<Directory key="2" type="show" title="TV Shows"/>'
+            '<Directory key="3" type="artist" title="Music"/>'
+            '</MediaContainer>'
+        ).encode()
+        return _conditional(request, self.stats, body, 'application/xml')
+
+    def _video(self, index, grouped=False):
+        genre = f'<Genre tag="{GENRES[index % len(GENRES)]}"/>'
+        if grouped and index % 4 == 3:
+            # The global hub groups new episodes of a season under the season
+            return (
+                f'<Directory type="season" librarySectionID="2" ratingKey="{index}"'
+                f' parentTitle={quoteattr(_title("Show", index // 2))}'
+                f' parentGuid="com.plexapp.agents.themoviedb://{20000 + index // 2}?lang=en"'
+                f' title="Season 1" index="1" leafCount="2" addedAt="{10 ** 9 - index}"/>'
+            )
+        if index % 2:
+            return (
+                f'<Video type="episode" librarySectionID="2" ratingKey="{index}"'
+                f' grandparentTitle={quoteattr(_title("Show", index // 2))}'
+                f' grandparentGuid="com.plexapp.agents.themoviedb://{20000 + index // 2}?lang=en"'
+                f' title={quoteattr(_title("Episode", index))} parentIndex="1" index="{index % 20 + 1}"'
+                f' originallyAvailableAt="{_day(-index)}" duration="2700000" addedAt="{10 ** 9 - index}">'
+                f'{genre}</Video>'
+            )
+        guid = f"com.plexapp.agents.themoviedb://{10000 + index}?lang=en" if index % 4 else f"plex://movie/{index}"
+        return (
+            f'<Video type="movie" librarySectionID="1" ratingKey="{index}"'
+            f' title={quoteattr(_title("Movie", index))} year="{2000 + index % 25}" guid="{guid}"'
+            f' summary="A generated movie used for benchmarking." originallyAvailableAt="{_day(-index)}"'
+            f' duration="6000000" addedAt="{10 ** 9 - index}">{genre}</Video>'
+        )
+
+    async def _recently_added(self, request):
+        section_id = request.match_info.get('section_id')
+        indexes = [
+            index for index in range(self.options.size)
+            if section_id is None or str(2 - index % 2) == section_id
+        ]
+        start = int(request.headers.get('X-Plex-Container-Start', 0))
+        size = int(request.headers.get('X-Plex-Container-Size', len(indexes)))
+        page = indexes[start:start + size]
+        body = (
+            f'<MediaContainer size="{len(page)}" totalSize="{len(indexes)}" offset="{start}">'
+            + ''.join(self._video(index, section_id is None) for index in page)
+            + '</MediaContainer>'
+        ).encode()
+        return _conditional(request, self.stats, body, 'application/xml')
+
+
+class JellyfinStub(StubUpstream):
+    """Jellyfin REST API."""
+
+    name = "jellyfin"
+
+    def routes(self):
+        return [
+            web.get('/Users', self._users),
+            web.get('/Users/{user_id}/Views', self._views),
+            web.get('/Users/{user_id}/Items/Latest', self._latest),
+            web.get('/Items/{item_id}/Images/{image_type}', self._image),
+        ]
+
+    async def _users(self, request):
+        return _json(request, self.stats, [
+            {'Id': 'user', 'Name': 'viewer', 'Policy': {'IsAdministrator': False}},
+            {'Id': 'admin', 'Name': 'admin', 'Policy': {'IsAdministrator': True}},
+        ])
+
+    async def _views(self, request):
+        return _json(request, self.stats, {'Items': [
+            {'Id': 'movies', 'CollectionType': 'movies'},
+            {'Id': 'tvshows', 'CollectionType': 'tvshows'},
+        ]})
+
+    def _item(self, index, episode):
+        # Every third item has no TMDB id and falls back to Jellyfin images
+        provider_ids = {} if index % 3 == 0 else {'Tmdb': str((20000 if episode else 10000) + index)}
+        item = {
+            'Id': f"item{index:05d}",
+            'Name': _title("Episode" if episode else "Movie", index),
+            'PremiereDate': f"{_day(-index)}T00:00:00.0000000Z",
+            'ProductionYear': 2000 + index % 25,
+            'RunTimeTicks': 36000000000,
+            'Genres': [GENRES[index % len(GENRES)]],
+            'Overview': "A generated item used for benchmarking.",
+            'ProviderIds': provider_ids,
+            'ImageTags': {'Primary': f"p{index}"},
+            'BackdropImageTags': [f"b{index}"],
+        }
+        if episode:
+            item.update({
+                'Type': 'Episode',
+                'SeriesName': _title("Show", index),
+                'SeriesId': f"series{index:05d}",
+                'ParentIndexNumber': 1,
+                'IndexNumber': index % 20 + 1,
+            })
+        else:
+            item['Type'] = 'Movie'
+        return item
+
+    async def _latest(self, request):
+        episode = request.query.get('ParentId') == 'tvshows'
+        limit = int(request.query.get('Limit', self.options.size))
+        count = min(limit, self.options.size)
+        return _json(request, self.stats, [self._item(index, episode) for index in range(count)])
+
+    async def _image(self, request):
+        seed = f"{request.match_info['item_id']}{request.query.get('tag')}".encode()
+        body = hashlib.sha256(seed).digest() * (IMAGE_SIZE // 32)
+        return web.Response(body=body, content_type='image/jpeg')
+
+
+class SonarrStub(StubUpstream):
+    """Sonarr v3 API."""
+
+    name = "sonarr"
+
+    def routes(self):
+        return [web.get('/api/v3/calendar', self._calendar)]
+
+    async def _calendar(self, request):
+        episodes = []
+        for index in range(self.options.size):
+            series_index = index // 3
+            series = {
+                'id': series_index,
+                'title': _title("Show", series_index),
+                'monitored': True,
+                'tvdbId': 30000 + series_index,
+                'runtime': 45,
+                'network': NETWORKS[series_index % len(NETWORKS)],
+                'genres': [GENRES[series_index % len(GENRES)]],
+            }
+            # Older Sonarr versions do not report TMDB ids
+            if series_index % 2:
+                series['tmdbId'] = 20000 + series_index
+            episodes.append({
+                'id': index,
+                'seriesId': series_index,
+                'title': _title("Episode", index),
+                'airDate': _day(index % 60),
+                'seasonNumber': 1,
+                'episodeNumber': index % 3 + 1,
+                'monitored': index % 10 != 0,
+                'series': series,
+            })
+        return _json(request, self.stats, episodes)
+
+
+class RadarrStub(StubUpstream):
+    """Radarr v3 API."""
+
+    name = "radarr"
+
+    def routes(self):
+        return [
+            web.get('/api/v3/movie', self._movies),
+            web.get('/api/v3/calendar', self._calendar),
+        ]
+
+    def _movie(self, index):
+        return {
+            'id': index,
+            'title': _title("Movie", index),
+            'year': 2025,
+            'tmdbId': 10000 + index,
+            'monitored': index % 5 != 0,
+            'hasFile': index % 2 == 0,
+            'inCinemas': f"{_day(index % 120 - 30)}T00:00:00Z",
+            'digitalRelease': f"{_day(index % 120 + 30)}T00:00:00Z",
+            'genres': [GENRES[index % len(GENRES)]],
+            'runtime': 110,
+            'ratings': {'value': 7.1},
+            'studio': "Benchmark Pictures",
+        }
+
+    async def _movies(self, request):
+        return _json(request, self.stats, [self._movie(index) for index in range(self.options.size)])
+
+    async def _calendar(self, request):
+        start = request.query.get('start', '')
+        end = request.query.get('end', '9999')
+        movies = []
+        for index in range(self.options.size):
+            movie = self._movie(index)
+            dates = [movie['inCinemas'][:10], movie['digitalRelease'][:10]]
+            if any(start <= day <= end for day in dates):
+                movies.append(movie)
+        return _json(request, self.stats, movies)
+
+
+class TMDBStub(StubUpstream):
+    """TMDB v3 API, including 429 rate limit responses."""
+
+    name = "tmdb"
+
+    def routes(self):
+        return [
+            web.get('/3/search/{media_type}', self._search),
+            web.get('/3/find/{external_id}', self._find),
+            web.get('/3/genre/{media_type}/list', self._genres),
+            web.get('/3/trending/{media_type}/{window}', self._listing),
+            web.get('/3/{media_type}/{list_type:[a-z_]+}', self._listing),
+            web.get('/3/{media_type}/{tmdb_id:\\d+}', self._details),
+        ]
+
+    @web.middleware
+    async def _middleware(self, request, handler):
+        if self.options.throttle_rate and self._rng.random() < self.options.throttle_rate:
+            self.stats.requests += 1
+            self.stats.errors += 1
+            return web.json_response({'status_code': 25}, status=429, headers={'Retry-After': '1'})
+        return await super()._middleware(request, handler)
+
+    async def _search(self, request):
+        query = request.query.get('query', '')
+        tmdb_id = 50000 + int(hashlib.sha1(query.encode()).hexdigest()[:6], 16) % 10000
+        return _json(request, self.stats, {'page': 1, 'results': [{'id': tmdb_id}], 'total_results': 1})
+
+    async def _find(self, request):
+        external_id = int(request.match_info['external_id'])
+        return _json(request, self.stats, {
+            'movie_results': [],
+            'tv_results': [{'id': external_id - 10000}],
+        })
+
+    async def _genres(self, request):
+        return _json(request, self.stats, {'genres': [
+            {'id': index, 'name': name} for index, name in enumerate(GENRES)
+        ]})
+
+    async def _listing(self, request):
+        page = int(request.query.get('page', 1))
+        total_pages = max(1, self.options.size // TMDB_PAGE_SIZE)
+        results = []
+        for offset in range(TMDB_PAGE_SIZE):
+            index = (page - 1) * TMDB_PAGE_SIZE + offset
+            movie = index % 2 == 0
+            results.append({
+                'id': (10000 if movie else 20000) + index,
+                'media_type': 'movie' if movie else 'tv',
+                'title' if movie else 'name': _title("Movie" if movie else "Show", index),
+                'release_date' if movie else 'first_air_date': _day(-index),
+                'overview': "A generated title used for benchmarking.",
+                'poster_path': f"/poster{index}.jpg",
+                'backdrop_path': f"/backdrop{index}.jpg",
+                'genre_ids': [index % len(GENRES)],
+                'popularity': 1000.0 - index,
+                'vote_average': 7.0,
+            })
+        return _json(request, self.stats, {
+            'page': page,
+            'results': results,
+            'total_pages': total_pages,
+            'total_results': total_pages * TMDB_PAGE_SIZE,
+        })
+
+    async def _details(self, request):
+        tmdb_id = int(request.match_info['tmdb_id'])
+        return _json(request, self.stats, {
+            'id': tmdb_id,
+            'title': _title("Title", tmdb_id),
+            'overview': "A generated title used for benchmarking.",
+            'genres': [{'id': 0, 'name': GENRES[tmdb_id % len(GENRES)]}],
+            'poster_path': f"/poster{tmdb_id}.jpg",
+            'backdrop_path': f"/backdrop{tmdb_id}.jpg",
+            'images': {
+                'posters': [{'file_path': f"/poster{tmdb_id}.jpg", 'vote_count': 3}],
+                'backdrops': [
+                    {'file_path': f"/backdrop{tmdb_id}-{n}.jpg", 'vote_count': n}
+                    for n in range(3)
+                ],
+            },
+            'external_ids': {'imdb_id': f"tt{tmdb_id:07d}", 'tvdb_id': tmdb_id + 10000},
+        })
+
+
+class TraktStub(StubUpstream):
+    """Trakt API with client credential tokens and paginated lists."""
+
+    name = "trakt"
+
+    def routes(self):
+        return [
+            web.post('/oauth/token', self._token),
+            web.get('/{media_type}/popular', self._popular),
+        ]
+
+    async def _token(self, request):
+        return web.json_response({
+            'access_token': 'benchmark-token',
+            'refresh_token': 'benchmark-refresh',
+            'token_type': 'bearer',
+            'expires_in': 7776000,
+            'created_at': 0,
+        })
+
+    async def _popular(self, request):
+        movies = request.match_info['media_type'] == 'movies'
+        limit = int(request.query.get('limit', 10))
+        page = int(request.query.get('page', 1))
+        page_count = max(1, -(-self.options.size // limit))
+        items = []
+        for offset in range(limit):
+            index = (page - 1) * limit + offset
+            if index >= self.options.size:
+                break
+            items.append({
+                'title': _title("Movie" if movies else "Show", index),
+                'year': 2000 + index % 25,
+                'ids': {
+                    'trakt': index,
+                    'slug': f"title-{index}",
+                    'imdb': f"tt{index:07d}",
+                    'tmdb': (10000 if movies else 20000) + index,
+                },
+            })
+        response = _json(request, self.stats, items)
+        response.headers['X-Pagination-Page'] = str(page)
+        response.headers['X-Pagination-Page-Count'] = str(page_count)
+        response.headers['X-Pagination-Item-Count'] = str(self.options.size)
+        return response
+
+
+UPSTREAMS = {
+    stub.name: stub
+    for stub in (PlexStub, JellyfinStub, SonarrStub, RadarrStub, TMDBStub, TraktStub)
+}
@@ -1,8 +1,6 @@
 # mediarr/__init__.py
 """The Mediarr integration."""
 
-DOMAIN = "mediarr"
-
 async def async_setup(hass, config):
     """Set up the Mediarr component."""
     return True
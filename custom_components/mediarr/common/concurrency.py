@@ -0,0 +1,49 @@
+"""Concurrency helpers for Mediarr."""
+import asyncio
+import logging
+
+_LOGGER = logging.getLogger(__name__)
+
+
+async def async_gather_bounded(items, worker, limit, deadline=None):
+    """Run worker over items with at most limit in flight, preserving order.
+
+    Exceptions raised by a worker are logged and replaced by None so one bad
+    item never sinks the rest of the batch. When a deadline (in seconds) is
+    given, items still running once it passes are cancelled and also
+    returned as None.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(item):
+        async with semaphore:
+            return await worker(item)
+
+    tasks = [asyncio.ensure_future(_run(item)) for item in items]
+    if not tasks:
+        return []
+
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    if pending:
+        _LOGGER.warning(
+            "Deadline of %ss reached, skipped %d of %d items",
+            deadline, len(pending), len(tasks)
+        )
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    results = []
+    for index, task in enumerate(tasks):
+        if task.cancelled():
+            results.append(None)
+        elif task.exception() is not None:
+            _LOGGER.error("Error processing item %s: %s", index, task.exception())
+            results.append(None)
+        else:
+            results.append(task.result())
+    return results
@@ -0,0 +1,77 @@
+"""Conditional request helpers for Mediarr upstream polls."""
+import hashlib
+
+
+class PayloadTracker:
+    """Remember validators, body digests and parsed results of upstream responses.
+
+    Sensors send the validators back as If-None-Match/If-Modified-Since and
+    compare body digests for servers that ignore them, so an unchanged
+    payload can be detected without parsing it again.
+    """
+
+    def __init__(self):
+        """Initialize the tracker."""
+        self._seen = {}
+
+    def request_headers(self, key):
+        """Return conditional request headers for a previously seen payload."""
+        seen = self._seen.get(key)
+        headers = {}
+        if seen is None or 'value' not in seen:
+            return headers
+        if seen['etag']:
+            headers['If-None-Match'] = seen['etag']
+        if seen['last_modified']:
+            headers['If-Modified-Since'] = seen['last_modified']
+        return headers
+
+    def check(self, key, response, body):
+        """Record a response and return True when its payload changed.
+
+        body is the raw response body, either bytes or an iterable of byte
+        chunks. A 304 response, or a body identical to the last processed
+        one, counts as unchanged as long as its parsed result is stored.
+        """
+        digest = hashlib.sha256()
+        if response.status != 304:
+            for chunk in ([body] if isinstance(body, (bytes, bytearray)) else body):
+                digest.update(chunk)
+        return self.record(key, response, digest.hexdigest())
+
+    def record(self, key, response, digest):
+        """Record a response by the digest of its body; see check.
+
+        For callers that hash the body themselves while streaming it.
+        """
+        seen = self._seen.get(key)
+        has_value = seen is not None and 'value' in seen
+        if response.status == 304:
+            return not has_value
+
+        if has_value and seen['digest'] == digest:
+            return False
+
+        self._seen[key] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'digest': digest,
+        }
+        return True
+
+    def store(self, key, value):
+        """Store the parsed result of the payload last recorded for key."""
+        if key in self._seen:
+            self._seen[key]['value'] = value
+
+    def cached(self, key):
+        """Return the parsed result stored for key."""
+        return self._seen.get(key, {}).get('value')
+
+    def forget(self, key):
+        """Drop everything known about one payload."""
+        self._seen.pop(key, None)
+
+    def clear(self):
+        """Drop everything, forcing the next poll to be fully processed."""
+        self._seen.clear()
@@ -1,14 +1,109 @@
 # mediarr/common/const.py
 from datetime import timedelta
 
+DOMAIN = "mediarr"
+
 # Sensor Configuration Constants
 CONF_MAX_ITEMS = "max_items"
 CONF_DAYS = "days_to_check"
+CONF_CONCURRENCY = "concurrency"
+CONF_UPDATE_DEADLINE = "update_deadline"
+CONF_FETCH_MODE = "fetch_mode"
+CONF_IMAGE_CACHE_MAX_MB = "image_cache_max_mb"
+CONF_IMAGE_CACHE_MAX_FILES = "image_cache_max_files"
+CONF_IMAGE_PROXY = "image_proxy"
+CONF_DIAGNOSTIC_SENSORS = "diagnostic_sensors"
+CONF_PUSH = "push"
 DEFAULT_MAX_ITEMS = 10
 DEFAULT_DAYS = 60
+DEFAULT_CONCURRENCY = 8
+DEFAULT_UPDATE_DEADLINE = 30
+DEFAULT_IMAGE_CACHE_MAX_MB = 200
+DEFAULT_IMAGE_CACHE_MAX_FILES = 1000
 
 # Scan Interval
 SCAN_INTERVAL = timedelta(minutes=10)
+# Minimum spacing between refreshes requested through a coordinator
+REQUEST_REFRESH_COOLDOWN = 10
+
+# Shared TMDB cache
+TMDB_CACHE_MAX_ENTRIES = 5000
+TMDB_SEARCH_TTL = timedelta(days=30)
+TMDB_DETAILS_TTL = timedelta(days=7)
+TMDB_FIND_TTL = timedelta(days=90)
+TMDB_CACHE_SAVE_DELAY = 60
+TMDB_IMAGE_LANGUAGES = "en,null"
+TMDB_GENRES_TTL = timedelta(days=1)
+
+# TMDB discovery lists
+TMDB_PAGE_SIZE = 20
+TMDB_DISCOVERY_MAX_PAGES = 5
+
+# Shared TMDB rate limit (requests per second and burst size)
+TMDB_RATE_LIMIT = 20
+TMDB_RATE_BURST = 20
+TMDB_MAX_RETRIES = 3
+TMDB_DEFAULT_RETRY_AFTER = 2
+
+# Per upstream HTTP connection pools
+UPSTREAM_LIMIT_PER_HOST = 10
+UPSTREAM_DNS_CACHE_TTL = 300
+# Seconds an idle connection is kept for reuse
+UPSTREAM_KEEPALIVE_TIMEOUT = 120
+UPSTREAM_CONNECT_TIMEOUT = 10
+# Longer than the websocket heartbeat, which keeps listeners reading
+UPSTREAM_READ_TIMEOUT = 60
+
+# Push updates over websockets
+# Safety net poll while a push connection is up
+PUSH_SCAN_INTERVAL = timedelta(hours=6)
+# Seconds to wait for a burst of push events to settle before refreshing
+PUSH_DEBOUNCE = 15
+WEBSOCKET_HEARTBEAT = 30
+WEBSOCKET_BACKOFF_MIN = 5
+WEBSOCKET_BACKOFF_MAX = 300
+# Radarr webhook changes touching more movies than this trigger a full rescan
+RADARR_WEBHOOK_MAX_FETCHES = 20
+
+# Image cache garbage collection
+IMAGE_CACHE_GC_INTERVAL = timedelta(hours=1)
+IMAGE_CACHE_GRACE = timedelta(days=3)
+
+# Resized image view
+IMAGE_PROXY_WIDTHS = (185, 342, 500, 780, 1280, 1920)
+IMAGE_PROXY_FORMATS = ("webp", "jpeg")
+IMAGE_PROXY_QUALITY = 80
+IMAGE_PROXY_WORKERS = 2
+IMAGE_POSTER_WIDTH = 500
+IMAGE_BACKDROP_WIDTH = 780
+IMAGE_FANART_WIDTH = 1280
+
+# Plex fetch modes
+PLEX_MODE_HUB = "hub"
+PLEX_MODE_SECTIONS = "sections"
+PLEX_SECTIONS_REFRESH_INTERVAL = timedelta(hours=1)
+
+# Radarr fetch modes
+RADARR_MODE_CALENDAR = "calendar"
+RADARR_MODE_LIBRARY = "library"
+RADARR_RECONCILE_INTERVAL = timedelta(hours=24)
+
+# Trakt API
+# Tokens are renewed this long before they expire
+TRAKT_TOKEN_REFRESH_MARGIN = timedelta(days=1)
+# Wait this long after a failed authentication before trying again
+TRAKT_AUTH_RETRY = timedelta(minutes=15)
+TRAKT_MAX_ATTEMPTS = 3
+TRAKT_BACKOFF_MIN = 1
+TRAKT_BACKOFF_MAX = 30
+# Largest page requested from list endpoints
+TRAKT_PAGE_LIMIT = 100
+# TMDB lookups in flight while enriching a list
+TRAKT_ENRICH_CONCURRENCY = 4
+
+# Sonarr series index
+SONARR_INDEX_RETRY = timedelta(days=1)
+SONARR_INDEX_SAVE_DELAY = 30
 
 # Server Types
 SERVER_TYPES = ["plex", "jellyfin", "emby"]
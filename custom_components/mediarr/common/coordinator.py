@@ -0,0 +1,43 @@
+"""Shared per-backend update coordinators for Mediarr."""
+import logging
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from .const import DOMAIN, REQUEST_REFRESH_COOLDOWN, SCAN_INTERVAL
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_COORDINATORS = "coordinators"
+
+
+class MediarrCoordinator(DataUpdateCoordinator):
+    """Poll one upstream backend once per interval for all of its sensors."""
+
+    def __init__(self, hass, key, update_method, update_interval=SCAN_INTERVAL):
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN} {key}",
+            update_method=update_method,
+            update_interval=update_interval,
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REQUEST_REFRESH_COOLDOWN, immediate=True
+            ),
+        )
+        self.key = key
+
+
+def async_get_coordinator(hass, key, update_method, update_interval=SCAN_INTERVAL):
+    """Return the coordinator for a backend, creating it on first use.
+
+    Coordinators are keyed by backend (usually its URL) along with the
+    settings that shape its result, so the update method of the first sensor
+    registered for a key serves every later one.
+    """
+    coordinators = hass.data.setdefault(DOMAIN, {}).setdefault(DATA_COORDINATORS, {})
+    coordinator = coordinators.get(key)
+    if coordinator is None:
+        coordinator = coordinators[key] = MediarrCoordinator(
+            hass, key, update_method, update_interval
+        )
+    return coordinator
@@ -0,0 +1,172 @@
+"""Disk-budgeted image cache for Mediarr."""
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
+from .const import (
+    DEFAULT_IMAGE_CACHE_MAX_FILES,
+    DEFAULT_IMAGE_CACHE_MAX_MB,
+    DOMAIN,
+    IMAGE_CACHE_GC_INTERVAL,
+    IMAGE_CACHE_GRACE
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+IMAGE_CACHE_DIR = "www/mediarr/cache"
+IMAGE_CACHE_URL = "/local/mediarr/cache"
+
+DATA_IMAGE_CACHE = "image_cache"
+
+# Leftover temporary files older than this are removed by the collector
+STALE_TEMP_SECONDS = 3600
+
+
+def write_atomic(path, content):
+    """Write content to path through a temporary file and an atomic rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class ImageCache:
+    """Track references to cached images and keep the cache within a disk budget.
+
+    Files are evicted least recently referenced first, and only once they
+    have not been referenced for the grace period, so images drifting in and
+    out of a sensor's top items are not thrown away and re-downloaded.
+    """
+
+    def __init__(self, hass, max_bytes, max_files, grace=IMAGE_CACHE_GRACE):
+        """Initialize the cache."""
+        self._hass = hass
+        self.path = Path(hass.config.path(IMAGE_CACHE_DIR))
+        self._max_bytes = max_bytes
+        self._max_files = max_files
+        self._grace = grace.total_seconds()
+        self._last_referenced = {}
+        self._unsubs = []
+        self.total_bytes = 0
+        self.total_files = 0
+        self.evicted = 0
+        self.runs = 0
+
+    def url_for(self, file_name):
+        """Return the /local URL of a cached file."""
+        return f"{IMAGE_CACHE_URL}/{file_name}"
+
+    def touch(self, file_name):
+        """Mark a cached file as referenced now."""
+        self._last_referenced[file_name] = time.time()
+
+    def async_start(self):
+        """Schedule garbage collection in the background."""
+        self._unsubs.append(async_call_later(self._hass, 60, self._async_collect))
+        self._unsubs.append(
+            async_track_time_interval(self._hass, self._async_collect, IMAGE_CACHE_GC_INTERVAL)
+        )
+        self._hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, self._async_stop)
+
+    async def _async_stop(self, event):
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+
+    async def _async_collect(self, now=None):
+        """Run one garbage collection pass off the event loop."""
+        try:
+            evicted = await self._hass.async_add_executor_job(
+                self._collect, dict(self._last_referenced), time.time()
+            )
+        except Exception as err:
+            _LOGGER.error("Error cleaning cached images: %s", err)
+            return
+        for file_name in evicted:
+            self._last_referenced.pop(file_name, None)
+
+    def _collect(self, referenced, now):
+        """Evict least recently referenced files until within budget."""
+        if not self.path.is_dir():
+            return []
+
+        files = []
+        with os.scandir(self.path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if entry.name.startswith('.'):
+                    # Temporary file left behind by an interrupted write
+                    if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                        os.unlink(entry.path)
+                    continue
+                last_used = max(referenced.get(entry.name, 0), stat.st_mtime)
+                files.append((last_used, entry.name, stat.st_size))
+
+        files.sort()
+        total_bytes = sum(size for _, _, size in files)
+        total_files = len(files)
+        evicted = []
+
+        for last_used, file_name, size in files:
+            if total_bytes <= self._max_bytes and total_files <= self._max_files:
+                break
+            if now - last_used < self._grace:
+                # Everything after this one was referenced even more recently
+                break
+            try:
+                os.unlink(self.path / file_name)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+            total_files -= 1
+            evicted.append(file_name)
+
+        self.total_bytes = total_bytes
+        self.total_files = total_files
+        self.evicted += len(evicted)
+        self.runs += 1
+        if evicted:
+            _LOGGER.debug("Evicted %d cached images, %d bytes in %d files remain",
+                          len(evicted), total_bytes, total_files)
+        return evicted
+
+    @property
+    def stats(self):
+        """Return cache counters as of the last collection."""
+        return {
+            'bytes': self.total_bytes,
+            'files': self.total_files,
+            'max_bytes': self._max_bytes,
+            'max_files': self._max_files,
+            'tracked': len(self._last_referenced),
+            'evicted': self.evicted,
+            'runs': self.runs,
+        }
+
+
+def async_setup_image_cache(hass, max_mb=DEFAULT_IMAGE_CACHE_MAX_MB, max_files=DEFAULT_IMAGE_CACHE_MAX_FILES):
+    """Create the shared image cache with its budget and start its collector."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cache = domain_data.get(DATA_IMAGE_CACHE)
+    if cache is None:
+        cache = domain_data[DATA_IMAGE_CACHE] = ImageCache(hass, max_mb * 1024 * 1024, max_files)
+        cache.async_start()
+    return cache
+
+
+def get_image_cache(hass):
+    """Return the shared image cache, or None before platform setup created it."""
+    return hass.data.get(DOMAIN, {}).get(DATA_IMAGE_CACHE)
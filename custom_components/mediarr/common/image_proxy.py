@@ -0,0 +1,219 @@
+"""Resized image view for Mediarr cards."""
+import asyncio
+import hashlib
+import hmac
+import logging
+import multiprocessing
+import re
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+import async_timeout
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from .const import (
+    DOMAIN,
+    IMAGE_PROXY_FORMATS,
+    IMAGE_PROXY_QUALITY,
+    IMAGE_PROXY_WIDTHS,
+    IMAGE_PROXY_WORKERS
+)
+from .image_cache import IMAGE_CACHE_URL, get_image_cache, write_atomic
+from .image_resize import resize_image
+from .tmdb_api import TMDB_IMAGE_BASE_URL
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_IMAGE_PROXY = "image_proxy"
+
+IMAGE_PROXY_URL = "/api/mediarr/image"
+
+SOURCE_TMDB = "tmdb"
+SOURCE_CACHE = "cache"
+
+# Plain file names only, so a request can never leave its source
+SAFE_NAME = re.compile(r"^[0-9A-Za-z_-]+\.(jpg|jpeg|png|webp)$")
+
+
+class MediarrImageView(HomeAssistantView):
+    """Serve TMDB and cached images resized for cards.
+
+    Authentication is not required, so card images load like files under
+    /local do. Instead every URL carries a signature from proxy_image_url,
+    so only images that a sensor actually published can be fetched and
+    resized.
+    """
+
+    url = IMAGE_PROXY_URL + "/{source}/{name}"
+    name = "api:mediarr:image"
+    requires_auth = False
+
+    def __init__(self, proxy):
+        """Initialize the view."""
+        self._proxy = proxy
+
+    async def get(self, request, source, name):
+        """Return the resized image."""
+        image_format = request.query.get('format', IMAGE_PROXY_FORMATS[0])
+        try:
+            width = int(request.query.get('width', IMAGE_PROXY_WIDTHS[-1]))
+        except ValueError:
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        if (
+            source not in (SOURCE_TMDB, SOURCE_CACHE)
+            or image_format not in IMAGE_PROXY_FORMATS
+            or not SAFE_NAME.match(name)
+        ):
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        if not self._proxy.verify(source, name, request.query.get('sig', '')):
+            return web.Response(status=HTTPStatus.FORBIDDEN)
+
+        path = await self._proxy.async_get(source, name, width, image_format)
+        if path is None:
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+        # Source names change whenever the image does
+        return web.FileResponse(path, headers={
+            'Cache-Control': 'public, max-age=31536000, immutable'
+        })
+
+
+class ImageProxy:
+    """Resize images in a process pool and memoize the results on disk."""
+
+    def __init__(self, hass, session):
+        """Initialize the proxy."""
+        self._hass = hass
+        self._session = session
+        self._pool = None
+        self._inflight = {}
+        # Signing key for published URLs; a restart republishes every card
+        self._key = secrets.token_bytes(32)
+        self.served = 0
+        self.resized = 0
+        self.errors = 0
+
+    def sign(self, source, name):
+        """Return the signature of an image URL."""
+        return hmac.new(self._key, f"{source}/{name}".encode(), hashlib.sha256).hexdigest()[:32]
+
+    def verify(self, source, name, signature):
+        """Return True if signature was issued for this image."""
+        return hmac.compare_digest(self.sign(source, name), signature)
+
+    def _executor(self):
+        """Return the process pool, starting it on first use."""
+        if self._pool is None:
+            # Spawn rather than fork the multi-threaded Home Assistant process
+            self._pool = ProcessPoolExecutor(
+                max_workers=IMAGE_PROXY_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._pool
+
+    def async_shutdown(self, event=None):
+        """Stop the process pool."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def async_get(self, source, name, width, image_format):
+        """Return the path of the resized image, rendering it if needed."""
+        # Snap to a fixed set of widths to bound the number of variants
+        width = next((w for w in IMAGE_PROXY_WIDTHS if w >= width), IMAGE_PROXY_WIDTHS[-1])
+        extension = 'webp' if image_format == 'webp' else 'jpg'
+        file_name = f"{source}_{name.rsplit('.', 1)[0]}_w{width}.{extension}"
+
+        image_cache = get_image_cache(self._hass)
+        if image_cache is None:
+            return None
+        image_cache.touch(file_name)
+        path = image_cache.path / file_name
+        self.served += 1
+        if await self._hass.async_add_executor_job(path.exists):
+            return path
+
+        task = self._inflight.get(file_name)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._async_render(source, name, width, image_format, path)
+            )
+            self._inflight[file_name] = task
+            task.add_done_callback(lambda _: self._inflight.pop(file_name, None))
+        # Shield so a client hanging up does not cancel the render for the others
+        return await asyncio.shield(task)
+
+    async def _async_render(self, source, name, width, image_format, path):
+        """Resize a source image into path."""
+        try:
+            content = await self._async_read_source(source, name)
+            if content is None:
+                return None
+            data = await asyncio.get_running_loop().run_in_executor(
+                self._executor(), resize_image, content, width, image_format, IMAGE_PROXY_QUALITY
+            )
+            await self._hass.async_add_executor_job(write_atomic, path, data)
+            self.resized += 1
+            return path
+        except Exception as err:
+            self.errors += 1
+            _LOGGER.error("Error resizing image %s/%s: %s", source, name, err)
+            return None
+
+    async def _async_read_source(self, source, name):
+        """Return the original image bytes."""
+        if source == SOURCE_CACHE:
+            path = get_image_cache(self._hass).path / name
+            try:
+                return await self._hass.async_add_executor_job(path.read_bytes)
+            except FileNotFoundError:
+                return None
+
+        async with async_timeout.timeout(30):
+            async with self._session.get(f"{TMDB_IMAGE_BASE_URL}/original/{name}") as response:
+                if response.status != 200:
+                    _LOGGER.debug("TMDB image %s returned %s", name, response.status)
+                    return None
+                return await response.read()
+
+    @property
+    def stats(self):
+        """Return proxy counters."""
+        return {
+            'served': self.served,
+            'resized': self.resized,
+            'errors': self.errors,
+            'inflight': len(self._inflight),
+        }
+
+
+def async_setup_image_proxy(hass, session):
+    """Register the resized image view once."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    proxy = domain_data.get(DATA_IMAGE_PROXY)
+    if proxy is None:
+        proxy = domain_data[DATA_IMAGE_PROXY] = ImageProxy(hass, session)
+        hass.http.register_view(MediarrImageView(proxy))
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, proxy.async_shutdown)
+    return proxy
+
+
+def proxy_image_url(hass, url, width):
+    """Rewrite a TMDB or cached image URL to its resized variant.
+
+    URLs are returned unchanged when the view is disabled or the image comes
+    from elsewhere.
+    """
+    proxy = hass.data.get(DOMAIN, {}).get(DATA_IMAGE_PROXY)
+    if not url or proxy is None:
+        return url
+    if url.startswith(f"{TMDB_IMAGE_BASE_URL}/"):
+        source = SOURCE_TMDB
+    elif url.startswith(f"{IMAGE_CACHE_URL}/"):
+        source = SOURCE_CACHE
+    else:
+        return url
+    name = url.rsplit('/', 1)[1]
+    if not SAFE_NAME.match(name):
+        return url
+    return f"{IMAGE_PROXY_URL}/{source}/{name}?width={width}&sig={proxy.sign(source, name)}"
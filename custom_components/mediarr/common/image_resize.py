@@ -0,0 +1,26 @@
+"""Image resizing worker for Mediarr.
+
+Runs in a separate process, so it must only depend on Pillow.
+"""
+import io
+from PIL import Image
+
+
+def resize_image(content, width, image_format, quality):
+    """Return content scaled down to width and encoded as webp or jpeg."""
+    with Image.open(io.BytesIO(content)) as source:
+        image = source
+        if source.width > width:
+            height = max(1, round(source.height * width / source.width))
+            # Let the JPEG decoder skip detail that is about to be thrown away
+            source.draft('RGB', (width, height))
+            image = source.resize((width, height), Image.LANCZOS)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+
+        output = io.BytesIO()
+        if image_format == 'webp':
+            image.save(output, format='WEBP', quality=quality, method=4)
+        else:
+            image.save(output, format='JPEG', quality=quality, optimize=True, progressive=True)
+        return output.getvalue()
@@ -0,0 +1,180 @@
+"""Request and update metrics for Mediarr."""
+import time
+from bisect import bisect_left
+from collections import Counter
+import aiohttp
+from .const import DOMAIN
+from .image_cache import DATA_IMAGE_CACHE
+from .image_proxy import DATA_IMAGE_PROXY
+from .tmdb_api import DATA_TMDB_LIMITER
+from .tmdb_cache import DATA_TMDB_CACHE
+
+DATA_METRICS = "metrics"
+DATA_SESSIONS = "sessions"
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class LatencyHistogram:
+    """Fixed bucket histogram of durations."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Initialize the histogram."""
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        """Record one duration."""
+        self.counts[bisect_left(self._buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self):
+        """Return the histogram with millisecond bucket labels."""
+        labels = [f"<={int(bound * 1000)}ms" for bound in self._buckets]
+        labels.append(f">{int(self._buckets[-1] * 1000)}ms")
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 1) if self.count else None,
+            'max_ms': round(self.max * 1000, 1),
+            'buckets': dict(zip(labels, self.counts)),
+        }
+
+
+class HostMetrics:
+    """Requests made to one upstream host."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.requests = 0
+        self.errors = 0
+        self.statuses = Counter()
+        self.latency = LatencyHistogram()
+
+    def as_dict(self):
+        """Return the counters."""
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'statuses': {str(status): count for status, count in sorted(self.statuses.items())},
+            'latency': self.latency.as_dict(),
+        }
+
+
+class UpdateMetrics:
+    """Updates run by one sensor."""
+
+    def __init__(self, name):
+        """Initialize the counters."""
+        self.name = name
+        self.updates = 0
+        self.failures = 0
+        self.last_duration = None
+        self.last_success = None
+        self.last_failure = None
+        self.duration = LatencyHistogram()
+
+    def as_dict(self):
+        """Return the counters."""
+        return {
+            'name': self.name,
+            'updates': self.updates,
+            'failures': self.failures,
+            'last_duration_ms': round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            'last_success': self.last_success,
+            'last_failure': self.last_failure,
+            'duration': self.duration.as_dict(),
+        }
+
+
+class MediarrMetrics:
+    """Collect per host request and per sensor update metrics."""
+
+    def __init__(self):
+        """Initialize the metrics."""
+        self.hosts = {}
+        self.updates = {}
+
+    def _host(self, url):
+        key = f"{url.host}:{url.port}"
+        host = self.hosts.get(key)
+        if host is None:
+            host = self.hosts[key] = HostMetrics()
+        return host
+
+    async def _on_request_start(self, session, context, params):
+        context.started = time.monotonic()
+
+    async def _on_request_end(self, session, context, params):
+        host = self._host(params.url)
+        host.requests += 1
+        host.statuses[params.response.status] += 1
+        if params.response.status >= 400:
+            host.errors += 1
+        host.latency.observe(time.monotonic() - context.started)
+
+    async def _on_request_exception(self, session, context, params):
+        host = self._host(params.url)
+        host.requests += 1
+        host.errors += 1
+        host.statuses[type(params.exception).__name__] += 1
+        host.latency.observe(time.monotonic() - context.started)
+
+    def trace_config(self):
+        """Return an aiohttp trace config feeding the host metrics."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        return trace_config
+
+    def update_metrics(self, key, name):
+        """Return the update metrics of a sensor."""
+        metrics = self.updates.get(key)
+        if metrics is None:
+            metrics = self.updates[key] = UpdateMetrics(name)
+        return metrics
+
+    def record_update(self, key, name, duration, success):
+        """Record one update of a sensor."""
+        metrics = self.update_metrics(key, name)
+        metrics.updates += 1
+        metrics.last_duration = duration
+        metrics.duration.observe(duration)
+        if success:
+            metrics.last_success = time.time()
+        else:
+            metrics.failures += 1
+            metrics.last_failure = time.time()
+
+    def as_dict(self):
+        """Return every metric."""
+        return {
+            'hosts': {key: host.as_dict() for key, host in sorted(self.hosts.items())},
+            'updates': {key: update.as_dict() for key, update in sorted(self.updates.items())},
+        }
+
+
+def get_metrics(hass):
+    """Return the metrics shared by every Mediarr sensor."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    metrics = domain_data.get(DATA_METRICS)
+    if metrics is None:
+        metrics = domain_data[DATA_METRICS] = MediarrMetrics()
+    return metrics
+
+
+def collect_metrics(hass):
+    """Return the metrics along with cache and rate limiter statistics."""
+    domain_data = hass.data.get(DOMAIN, {})
+    data = get_metrics(hass).as_dict()
+    for key in (DATA_TMDB_CACHE, DATA_TMDB_LIMITER, DATA_IMAGE_CACHE, DATA_IMAGE_PROXY, DATA_SESSIONS):
+        component = domain_data.get(key)
+        if component is not None:
+            data[key] = component.stats
+    return data
@@ -0,0 +1,122 @@
+"""Diagnostic sensors exposing Mediarr metrics."""
+from homeassistant.components.sensor import SensorEntity
+from homeassistant.const import EntityCategory, UnitOfTime
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from .const import SCAN_INTERVAL
+from .coordinator import async_get_coordinator
+from .metrics import collect_metrics, get_metrics
+
+
+class MediarrUpdateDurationSensor(SensorEntity):
+    """Duration of the last update of a Mediarr sensor."""
+
+    _unrecorded_attributes = frozenset({"duration"})
+
+    def __init__(self, sensor):
+        """Initialize the sensor."""
+        self._sensor = sensor
+        self._name = f"{sensor.name} Update Duration"
+        self._unique_id = f"{sensor.unique_id}_update_duration"
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return self._name
+
+    @property
+    def unique_id(self):
+        """Return a unique ID."""
+        return self._unique_id
+
+    @property
+    def entity_category(self):
+        """Return the entity category."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def native_unit_of_measurement(self):
+        """Return the unit of the duration."""
+        return UnitOfTime.MILLISECONDS
+
+    @property
+    def should_poll(self):
+        """Updated together with the monitored sensor."""
+        return False
+
+    @property
+    def _metrics(self):
+        return get_metrics(self.hass).updates.get(self._sensor.unique_id)
+
+    @property
+    def native_value(self):
+        """Return the duration of the last update."""
+        metrics = self._metrics
+        if metrics is None or metrics.last_duration is None:
+            return None
+        return round(metrics.last_duration * 1000, 1)
+
+    @property
+    def extra_state_attributes(self):
+        """Return update counters and the duration histogram."""
+        metrics = self._metrics
+        return metrics.as_dict() if metrics else {}
+
+    async def async_added_to_hass(self):
+        """Follow the coordinator of the monitored sensor."""
+        await super().async_added_to_hass()
+        coordinator = async_get_coordinator(
+            self.hass, self._sensor.coordinator_key, self._sensor._async_coordinator_update
+        )
+        self.async_on_remove(coordinator.async_add_listener(self.async_write_ha_state))
+
+
+class MediarrMetricsSensor(SensorEntity):
+    """Upstream requests, caches and rate limiting across all Mediarr sensors."""
+
+    _unrecorded_attributes = frozenset({
+        "hosts", "sessions", "tmdb_cache", "tmdb_limiter", "image_cache", "image_proxy"
+    })
+
+    @property
+    def name(self):
+        """Return the name of the sensor."""
+        return "Mediarr Requests"
+
+    @property
+    def unique_id(self):
+        """Return a unique ID."""
+        return "mediarr_metrics_requests"
+
+    @property
+    def entity_category(self):
+        """Return the entity category."""
+        return EntityCategory.DIAGNOSTIC
+
+    @property
+    def should_poll(self):
+        """Refreshed on the backend interval instead of every 30 seconds."""
+        return False
+
+    async def async_added_to_hass(self):
+        """Write the counters as often as the backends are polled."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(self.hass, self._async_refresh, SCAN_INTERVAL)
+        )
+
+    @callback
+    def _async_refresh(self, now=None):
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self):
+        """Return the number of upstream requests made."""
+        return sum(host.requests for host in get_metrics(self.hass).hosts.values())
+
+    @property
+    def extra_state_attributes(self):
+        """Return per host metrics along with cache and rate limiter statistics."""
+        data = collect_metrics(self.hass)
+        data.pop('updates')
+        return data
@@ -0,0 +1,97 @@
+"""Token bucket rate limiting with priority lanes for Mediarr."""
+import asyncio
+import heapq
+import itertools
+import time
+
+PRIORITY_VISIBLE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+
+class RateLimiter:
+    """Token bucket that hands out tokens to waiters by priority, then FIFO."""
+
+    def __init__(self, rate, burst):
+        """Initialize the limiter with rate tokens per second and a burst size."""
+        self._rate = rate
+        self._capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._wakeup = None
+        self.granted = 0
+        self.deferred = 0
+        self.throttled = 0
+
+    def _refill(self, now):
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def _try_acquire(self):
+        now = time.monotonic()
+        if now < self._blocked_until:
+            return False
+        self._refill(now)
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def async_acquire(self, priority=PRIORITY_NORMAL):
+        """Wait for a token; lower priority values are served first."""
+        if not self._waiters and self._try_acquire():
+            self.granted += 1
+            return
+
+        self.deferred += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._schedule(0)
+        await future
+        self.granted += 1
+
+    def _schedule(self, delay):
+        if self._wakeup is None:
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def _dispatch(self):
+        """Release tokens to waiters and re-arm until the queue is drained."""
+        self._wakeup = None
+        while self._waiters:
+            if self._waiters[0][2].done():
+                # Waiter was cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if not self._try_acquire():
+                break
+            _, _, future = heapq.heappop(self._waiters)
+            future.set_result(None)
+
+        if self._waiters:
+            now = time.monotonic()
+            delay = max(self._blocked_until - now, (1 - self._tokens) / self._rate, 0)
+            self._schedule(delay)
+
+    def backoff(self, retry_after):
+        """Stop handing out tokens for retry_after seconds (e.g. after a 429)."""
+        self.throttled += 1
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+        # Treat the server's window as spent so traffic resumes gradually
+        self._tokens = 0
+        self._updated = self._blocked_until
+
+    @property
+    def stats(self):
+        """Return limiter counters."""
+        return {
+            'rate': self._rate,
+            'burst': self._capacity,
+            'granted': self.granted,
+            'deferred': self.deferred,
+            'throttled': self.throttled,
+            'waiting': sum(1 for waiter in self._waiters if not waiter[2].done()),
+            'blocked_for': round(max(self._blocked_until - time.monotonic(), 0), 1),
+        }
@@ -1,14 +1,43 @@
 # mediarr/common/sensor.py
+import hashlib
+import json
+import time
+from abc import ABC, abstractmethod
 from homeassistant.components.sensor import SensorEntity
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import UpdateFailed
+from .coordinator import async_get_coordinator
+from .metrics import get_metrics
 
-class MediarrSensor(SensorEntity):
-    """Base class for Mediarr sensors."""
+
+def payload_fingerprint(state, attributes):
+    """Return a stable digest of a state and its attributes."""
+    payload = json.dumps([state, attributes], sort_keys=True, default=str).encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+class MediarrSensor(SensorEntity, ABC):
+    """Base class for Mediarr sensors.
+
+    Subclasses implement _async_update_data, which fetches from the backend
+    and sets _state, _attributes and _available. It is run by a coordinator
+    shared by every sensor with the same coordinator_key, and the result is
+    fanned out to all of them, so the key has to cover every setting that
+    shapes the result.
+    """
+
+    # The card payload is large and only meaningful while current
+    _unrecorded_attributes = frozenset({"data"})
     
     def __init__(self):
         """Initialize the sensor."""
         self._state = None
         self._attributes = {}
         self._available = True
+        self._coordinator = None
+        self._fingerprint = None
+        self._written_fingerprint = None
+        self._fingerprinted = (None, None)
 
     @property
     def state(self):
@@ -23,4 +52,91 @@ class MediarrSensor(SensorEntity):
     @property
     def extra_state_attributes(self):
         """Return the state attributes."""
-        return self._attributes
\ No newline at end of file
+        return self._attributes
+
+    @property
+    def should_poll(self):
+        """Polling is done by the backend coordinator."""
+        return False
+
+    @property
+    def coordinator_key(self):
+        """Return the key of the backend this sensor reads from."""
+        return self.unique_id
+
+    @property
+    def coordinator(self):
+        """Return the coordinator polling this sensor's backend."""
+        if self._coordinator is None:
+            self._coordinator = async_get_coordinator(
+                self.hass, self.coordinator_key, self._async_coordinator_update
+            )
+        return self._coordinator
+
+    @abstractmethod
+    async def _async_update_data(self):
+        """Fetch data from the backend and update the sensor attributes."""
+
+    def _payload_fingerprint(self):
+        """Return a stable digest of the current state and attributes."""
+        # Updates that find the upstream unchanged keep the same attributes object
+        attributes, fingerprint = self._fingerprinted
+        if attributes is not self._attributes:
+            fingerprint = payload_fingerprint(self._state, self._attributes)
+            self._fingerprinted = (self._attributes, fingerprint)
+        return fingerprint
+
+    async def _async_coordinator_update(self):
+        """Run an update for the coordinator and return the shared result."""
+        started = time.monotonic()
+        await self._async_update_data()
+        self._record_update(time.monotonic() - started)
+        if not self._available:
+            raise UpdateFailed(f"Error updating {self.name}")
+        return {
+            'state': self._state,
+            'attributes': self._attributes,
+            'fingerprint': self._payload_fingerprint(),
+        }
+
+    def _record_update(self, duration):
+        """Record the duration and outcome of an update under this sensor."""
+        get_metrics(self.hass).record_update(self.unique_id, self.name, duration, self._available)
+
+    def _apply_coordinator_data(self):
+        """Copy the latest coordinator result onto this sensor."""
+        coordinator = self.coordinator
+        if not coordinator.last_update_success:
+            self._state = 0
+            self._attributes = {'data': []}
+            self._available = False
+            self._fingerprint = None
+        elif coordinator.data is not None:
+            self._state = coordinator.data['state']
+            self._attributes = coordinator.data['attributes']
+            self._available = True
+            self._fingerprint = coordinator.data['fingerprint']
+
+    async def async_added_to_hass(self):
+        """Subscribe to coordinator updates."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_listener(self._handle_coordinator_update)
+        )
+        self._apply_coordinator_data()
+        self._written_fingerprint = (self._available, self._fingerprint)
+
+    @callback
+    def _handle_coordinator_update(self):
+        """Handle updated data from the coordinator, skipping identical payloads."""
+        self._apply_coordinator_data()
+        fingerprint = (self._available, self._fingerprint)
+        if fingerprint == self._written_fingerprint:
+            return
+        self._written_fingerprint = fingerprint
+        self.async_write_ha_state()
+
+    async def async_update(self):
+        """Request a (debounced) refresh from the backend coordinator."""
+        await self.coordinator.async_request_refresh()
+        self._apply_coordinator_data()
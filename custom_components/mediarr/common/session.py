@@ -0,0 +1,95 @@
+"""Pooled HTTP sessions for Mediarr upstreams."""
+import logging
+import aiohttp
+from yarl import URL
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl as ssl_util
+from .const import (
+    DOMAIN,
+    UPSTREAM_CONNECT_TIMEOUT,
+    UPSTREAM_DNS_CACHE_TTL,
+    UPSTREAM_KEEPALIVE_TIMEOUT,
+    UPSTREAM_LIMIT_PER_HOST,
+    UPSTREAM_READ_TIMEOUT
+)
+from .metrics import DATA_SESSIONS, get_metrics
+
+_LOGGER = logging.getLogger(__name__)
+
+UPSTREAM_TMDB = "tmdb"
+UPSTREAM_TRAKT = "trakt"
+
+
+class SessionManager:
+    """One keep-alive connection pool per upstream.
+
+    LAN servers and internet APIs get separate pools, so a slow TMDB burst
+    cannot take the connections a Plex update is waiting for, and idle
+    connections are kept long enough to be reused by the next poll instead
+    of repeating the TCP and TLS handshakes.
+    """
+
+    def __init__(self, hass):
+        """Initialize the manager and close every pool when Home Assistant stops."""
+        self._hass = hass
+        self._sessions = {}
+        self._trace_config = get_metrics(hass).trace_config()
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_close)
+
+    def get(self, upstream):
+        """Return the session of an upstream, creating it on first use."""
+        session = self._sessions.get(upstream)
+        if session is None:
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_util.get_default_context(),
+                limit_per_host=UPSTREAM_LIMIT_PER_HOST,
+                ttl_dns_cache=UPSTREAM_DNS_CACHE_TTL,
+                keepalive_timeout=UPSTREAM_KEEPALIVE_TIMEOUT,
+            )
+            # No total timeout: websocket listeners share these sessions
+            session = self._sessions[upstream] = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(
+                    total=None,
+                    connect=UPSTREAM_CONNECT_TIMEOUT,
+                    sock_read=UPSTREAM_READ_TIMEOUT,
+                ),
+                headers={aiohttp.hdrs.USER_AGENT: SERVER_SOFTWARE},
+                trace_configs=[self._trace_config],
+            )
+            _LOGGER.debug("Created HTTP session for %s", upstream)
+        return session
+
+    async def _async_close(self, event=None):
+        sessions, self._sessions = self._sessions, {}
+        for session in sessions.values():
+            await session.close()
+
+    @property
+    def stats(self):
+        """Return the pools and their connection limits."""
+        return {
+            upstream: {
+                'limit_per_host': session.connector.limit_per_host,
+                'closed': session.closed,
+            }
+            for upstream, session in sorted(self._sessions.items())
+        }
+
+
+def upstream_key(url):
+    """Return the pool key of a server URL: its scheme, host and port."""
+    url = URL(url)
+    return str(url.origin()) if url.is_absolute() else str(url)
+
+
+def async_get_session(hass, upstream):
+    """Return the pooled session of an upstream, a server URL or UPSTREAM_*."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    manager = domain_data.get(DATA_SESSIONS)
+    if manager is None:
+        manager = domain_data[DATA_SESSIONS] = SessionManager(hass)
+    if upstream not in (UPSTREAM_TMDB, UPSTREAM_TRAKT):
+        upstream = upstream_key(upstream)
+    return manager.get(upstream)
@@ -0,0 +1,154 @@
+"""Shared, rate limited access to the TMDB API for Mediarr."""
+import logging
+from contextvars import ContextVar
+import async_timeout
+from .const import (
+    DOMAIN,
+    TMDB_DEFAULT_RETRY_AFTER,
+    TMDB_DETAILS_TTL,
+    TMDB_GENRES_TTL,
+    TMDB_IMAGE_LANGUAGES,
+    TMDB_MAX_RETRIES,
+    TMDB_RATE_BURST,
+    TMDB_RATE_LIMIT
+)
+from .rate_limit import PRIORITY_NORMAL, RateLimiter
+from .tmdb_cache import get_tmdb_cache
+
+_LOGGER = logging.getLogger(__name__)
+
+TMDB_BASE_URL = "https://api.themoviedb.org/3"
+TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
+
+DATA_TMDB_LIMITER = "tmdb_limiter"
+
+# Priority of TMDB requests made from the current task
+_tmdb_priority = ContextVar("mediarr_tmdb_priority", default=PRIORITY_NORMAL)
+
+
+class TMDBError(Exception):
+    """Raised when TMDB answers with an unexpected status."""
+
+
+def set_tmdb_priority(priority):
+    """Set the priority lane used by TMDB requests from the current task."""
+    _tmdb_priority.set(priority)
+
+
+def get_tmdb_limiter(hass):
+    """Return the rate limiter shared by all TMDB traffic."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    limiter = domain_data.get(DATA_TMDB_LIMITER)
+    if limiter is None:
+        limiter = domain_data[DATA_TMDB_LIMITER] = RateLimiter(TMDB_RATE_LIMIT, TMDB_RATE_BURST)
+    return limiter
+
+
+def _retry_after(response):
+    """Return the Retry-After delay of a response in seconds."""
+    try:
+        return max(float(response.headers.get('Retry-After')), 0)
+    except (TypeError, ValueError):
+        return TMDB_DEFAULT_RETRY_AFTER
+
+
+async def async_fetch_tmdb(hass, session, api_key, endpoint, params=None):
+    """GET a TMDB endpoint through the shared rate limiter.
+
+    Returns the decoded JSON, or None when the resource does not exist.
+    429 responses back off for Retry-After and are retried a few times
+    before TMDBError is raised.
+    """
+    limiter = get_tmdb_limiter(hass)
+    url = f"{TMDB_BASE_URL}/{endpoint}"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Accept": "application/json"
+    }
+    if params:
+        params = {k: str(v) if v is not None else "" for k, v in params.items()}
+
+    for attempt in range(TMDB_MAX_RETRIES + 1):
+        await limiter.async_acquire(_tmdb_priority.get())
+        async with async_timeout.timeout(10):
+            async with session.get(url, params=params, headers=headers) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status == 404:
+                    _LOGGER.debug("TMDB resource not found: %s", url)
+                    return None
+                if response.status != 429:
+                    raise TMDBError(f"TMDB API error: {response.status} for URL: {url}")
+                retry_after = _retry_after(response)
+
+        if attempt == TMDB_MAX_RETRIES:
+            # Holding back every other caller only helps if a retry follows
+            break
+        _LOGGER.debug(
+            "TMDB rate limited on %s, retrying in %ss (attempt %d)",
+            url, retry_after, attempt + 1
+        )
+        limiter.backoff(retry_after)
+
+    raise TMDBError(f"TMDB API still rate limited after {TMDB_MAX_RETRIES} retries for URL: {url}")
+
+
+def _image_url(size, path):
+    """Build a TMDB image URL for a file path."""
+    return f"{TMDB_IMAGE_BASE_URL}/{size}{path}" if path else None
+
+
+def parse_tmdb_details(data):
+    """Reduce a details + images + external_ids response to the shared shape."""
+    images = data.get('images') or {}
+
+    posters = images.get('posters') or []
+    poster_path = posters[0].get('file_path') if posters else data.get('poster_path')
+
+    # Sort backdrops by vote count to get the most popular
+    backdrops = sorted(
+        images.get('backdrops') or [],
+        key=lambda x: x.get('vote_count', 0),
+        reverse=True
+    )
+    backdrop_path = backdrops[0].get('file_path') if backdrops else data.get('backdrop_path')
+    main_backdrop_path = backdrops[1].get('file_path') if len(backdrops) > 1 else backdrop_path
+
+    return {
+        'tmdb_id': data.get('id'),
+        'title': data.get('title') or data.get('name'),
+        'overview': data.get('overview'),
+        'genres': [g['name'] for g in data.get('genres', [])],
+        'poster': _image_url('w500', poster_path),
+        'backdrop': _image_url('w780', backdrop_path),
+        'main_backdrop': _image_url('original', main_backdrop_path),
+        # The images TMDB itself picked for the title
+        'canonical_poster': _image_url('w500', data.get('poster_path')),
+        'canonical_backdrop': _image_url('original', data.get('backdrop_path')),
+        'external_ids': data.get('external_ids') or {},
+    }
+
+
+async def async_get_tmdb_details(hass, session, api_key, tmdb_id, media_type='movie'):
+    """Return details, images and external IDs of a title from one cached request."""
+    async def _fetch():
+        data = await async_fetch_tmdb(hass, session, api_key, f"{media_type}/{tmdb_id}", {
+            'append_to_response': 'images,external_ids',
+            'include_image_language': TMDB_IMAGE_LANGUAGES,
+        })
+        return parse_tmdb_details(data) if data else None
+
+    return await get_tmdb_cache(hass).async_get_or_fetch(
+        f"details_{media_type}_{tmdb_id}", _fetch, TMDB_DETAILS_TTL
+    )
+
+
+async def async_get_tmdb_genres(hass, session, api_key, media_type='movie'):
+    """Return the TMDB genre ID to name map of a media type, cached for a day."""
+    async def _fetch():
+        data = await async_fetch_tmdb(hass, session, api_key, f"genre/{media_type}/list")
+        return {genre['id']: genre['name'] for genre in data.get('genres', [])} if data else None
+
+    return await get_tmdb_cache(hass).async_get_or_fetch(
+        f"genres_{media_type}", _fetch, TMDB_GENRES_TTL
+    )
@@ -0,0 +1,175 @@
+"""Integration-wide TMDB metadata cache for Mediarr."""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from homeassistant.helpers.storage import Store
+from .const import DOMAIN, TMDB_CACHE_MAX_ENTRIES, TMDB_CACHE_SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+DATA_TMDB_CACHE = "tmdb_cache"
+
+STORAGE_VERSION = 2
+STORAGE_KEY = f"{DOMAIN}.tmdb_cache"
+
+# Only ID and image mappings are worth keeping across restarts
+PERSISTED_PREFIXES = ("search_", "find_", "details_")
+
+
+class TMDBCacheStore(Store):
+    """Storage for persisted TMDB cache entries."""
+
+    async def _async_migrate_func(self, old_major_version, old_minor_version, old_data):
+        """Drop entries written by an incompatible cache layout."""
+        _LOGGER.debug(
+            "Discarding TMDB cache stored with version %s.%s",
+            old_major_version, old_minor_version
+        )
+        return {'entries': {}}
+
+
+class TMDBCache:
+    """Bounded LRU cache with per-entry TTLs and single-flight fetching."""
+
+    def __init__(self, max_entries=TMDB_CACHE_MAX_ENTRIES):
+        """Initialize the cache."""
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        """Return the live (expires_at, value) entry for a key, dropping stale ones."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] is not None and entry[0] <= time.time():
+            del self._entries[key]
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key, default=None):
+        """Return a cached value, or default when missing or expired."""
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries when full."""
+        expires_at = time.time() + ttl.total_seconds() if ttl else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        if self._store is not None and key.startswith(PERSISTED_PREFIXES):
+            self._store.async_delay_save(self._data_to_save, TMDB_CACHE_SAVE_DELAY)
+
+    async def async_get_or_fetch(self, key, fetch, ttl=None):
+        """Return a cached value or await fetch() once for all concurrent callers.
+
+        Only non-None results are cached, so failed lookups are retried on the
+        next call.
+        """
+        entry = self._lookup(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.ensure_future(self._async_fill(key, fetch, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so a cancelled caller does not cancel the fetch for the others
+        return await asyncio.shield(task)
+
+    async def _async_fill(self, key, fetch, ttl):
+        value = await fetch()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    async def async_load(self, hass):
+        """Attach persistent storage and warm the cache from it."""
+        if self._store is not None:
+            return
+        self._store = TMDBCacheStore(hass, STORAGE_VERSION, STORAGE_KEY)
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.error("Error loading TMDB cache: %s", err)
+            return
+
+        now = time.time()
+        loaded = 0
+        for key, (expires_at, value) in (data or {}).get('entries', {}).items():
+            # Expired entries are dropped so they are revalidated on next use
+            if expires_at is not None and expires_at <= now:
+                continue
+            if isinstance(value, list):
+                value = tuple(value)
+            self._entries.setdefault(key, (expires_at, value))
+            loaded += 1
+        _LOGGER.debug("Loaded %d TMDB cache entries from storage", loaded)
+
+    def _data_to_save(self):
+        """Return the persisted subset of the cache."""
+        now = time.time()
+        return {
+            'entries': {
+                key: [expires_at, value]
+                for key, (expires_at, value) in self._entries.items()
+                if key.startswith(PERSISTED_PREFIXES)
+                and (expires_at is None or expires_at > now)
+            }
+        }
+
+    @property
+    def stats(self):
+        """Return cache counters."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'max_entries': self._max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'inflight': len(self._inflight),
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+        }
+
+
+def get_tmdb_cache(hass):
+    """Return the TMDB cache shared by every Mediarr sensor."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cache = domain_data.get(DATA_TMDB_CACHE)
+    if cache is None:
+        cache = domain_data[DATA_TMDB_CACHE] = TMDBCache()
+    return cache
+
+
+async def async_setup_tmdb_cache(hass):
+    """Create the shared TMDB cache and load its persisted entries."""
+    cache = get_tmdb_cache(hass)
+    await cache.async_load(hass)
+    return cache
@@ -1,13 +1,22 @@
 """TMDB-based media sensor for Mediarr."""
 import logging
 from abc import ABC, abstractmethod
-import async_timeout
 from datetime import datetime
 from ..common.sensor import MediarrSensor
+from .const import (
+    IMAGE_BACKDROP_WIDTH,
+    IMAGE_FANART_WIDTH,
+    IMAGE_POSTER_WIDTH,
+    TMDB_FIND_TTL,
+    TMDB_SEARCH_TTL
+)
+from .image_proxy import proxy_image_url
+from .rate_limit import PRIORITY_BACKGROUND, PRIORITY_VISIBLE
+from .session import UPSTREAM_TMDB, async_get_session
+from .tmdb_api import async_fetch_tmdb, async_get_tmdb_details, set_tmdb_priority
+from .tmdb_cache import get_tmdb_cache
 
 _LOGGER = logging.getLogger(__name__)
-TMDB_BASE_URL = "https://api.themoviedb.org/3"
-TMDB_IMAGE_BASE_URL = "https://image.tmdb.org/t/p"
 
 class TMDBMediaSensor(MediarrSensor, ABC):
     """Base class for TMDB-based media sensors."""
@@ -18,7 +27,19 @@ class TMDBMediaSensor(MediarrSensor, ABC):
         self._session = session
         self._tmdb_api_key = tmdb_api_key
         self._available = True
-        self._cache = {}
+        # Set when a TMDB lookup failed during the current update, as opposed
+        # to TMDB having no match, so the payload is enriched again next poll
+        self._tmdb_failed = False
+
+    @property
+    def _cache(self):
+        """Return the TMDB cache shared across all Mediarr sensors."""
+        return get_tmdb_cache(self.hass)
+
+    @property
+    def _tmdb_session(self):
+        """Return the TMDB connection pool, kept apart from the backend's."""
+        return async_get_session(self.hass, UPSTREAM_TMDB)
 
     # In tmdb_sensor.py, update _format_date method
     def _format_date(self, date_str):
@@ -36,112 +57,132 @@ class TMDBMediaSensor(MediarrSensor, ABC):
         except Exception:
             return 'Unknown'
 
-    async def _fetch_tmdb_data(self, endpoint, params=None):
-        """Fetch data from TMDB API."""
+    async def _fetch_tmdb_data(self, endpoint, params=None, raise_errors=False):
+        """Fetch data from TMDB API.
+
+        Errors are logged and turn into None unless raise_errors is set.
+        """
         try:
             if not self._tmdb_api_key:
                 _LOGGER.error("No TMDB API key provided")
                 return None
 
-            headers = {
-                "Authorization": f"Bearer {self._tmdb_api_key}",
-                "Accept": "application/json"
-            }
-
-            url = f"{TMDB_BASE_URL}/{endpoint}"
-            
-            if params:
-                params = {k: str(v) if v is not None else "" for k, v in params.items()}
-            
-            async with async_timeout.timeout(10):
-                async with self._session.get(
-                    url,
-                    params=params,
-                    headers=headers
-                ) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    elif response.status == 404:
-                        _LOGGER.debug("TMDB resource not found: %s", url)
-                        return None
-                    else:
-                        _LOGGER.error("TMDB API error: %s for URL: %s", response.status, url)
-                        return None
+            return await async_fetch_tmdb(
+                self.hass, self._tmdb_session, self._tmdb_api_key, endpoint, params
+            )
         except Exception as err:
+            if raise_errors:
+                raise
             _LOGGER.error("Error fetching TMDB data: %s", err)
             return None
 
-    async def _get_tmdb_images(self, tmdb_id, media_type='movie'):
-        """Get TMDB image URLs with varied options."""
-        if not tmdb_id:
-            return None, None, None
+    async def _process_ranked(self, ranked_item):
+        """Process an (index, item) pair, giving likely visible items TMDB priority."""
+        index, item = ranked_item
+        set_tmdb_priority(PRIORITY_VISIBLE if index < self._max_items else PRIORITY_BACKGROUND)
+        return await self._process_item(item)
 
-        cache_key = f"images_{media_type}_{tmdb_id}"
-        if cache_key in self._cache:
-            return self._cache[cache_key]
-            
+    async def _get_tmdb_details(self, tmdb_id, media_type='movie'):
+        """Get details, images and external IDs of a title in a single TMDB call.
+
+        Returns None when TMDB has no match, and also on errors, which set
+        _tmdb_failed.
+        """
+        if not tmdb_id or not self._tmdb_api_key:
+            return None
         try:
-            data = await self._fetch_tmdb_data(f"{media_type}/{tmdb_id}/images")
-            _LOGGER.debug("Raw TMDB data for %s: %s", tmdb_id, data)  # Add this line
-            
-            if data:
-                # Get posters
-                posters = data.get('posters', [])
-                _LOGGER.debug("Posters found: %s", len(posters))  # Add this line
-                poster_path = posters[0].get('file_path') if posters else None
-                
-                # Get backdrops
-                backdrops = data.get('backdrops', [])
-                _LOGGER.debug("Backdrops found: %s", len(backdrops))  # Add this line
-                # Sort backdrops by vote count to get the most popular
-                backdrops.sort(key=lambda x: x.get('vote_count', 0), reverse=True)
-                
-                backdrop_path = backdrops[0].get('file_path') if backdrops else None
-                main_backdrop_path = backdrops[1].get('file_path') if len(backdrops) > 1 else backdrop_path
-
-                poster_url = f"{TMDB_IMAGE_BASE_URL}/w500{poster_path}" if poster_path else None
-                backdrop_url = f"{TMDB_IMAGE_BASE_URL}/w780{backdrop_path}" if backdrop_path else None
-                main_backdrop_url = f"{TMDB_IMAGE_BASE_URL}/original{main_backdrop_path}" if main_backdrop_path else None
-
-                result = (poster_url, backdrop_url, main_backdrop_url)
-                self._cache[cache_key] = result
-                return result
-            
-            return None, None, None
-            
+            return await async_get_tmdb_details(
+                self.hass, self._tmdb_session, self._tmdb_api_key, tmdb_id, media_type
+            )
         except Exception as err:
-            _LOGGER.error("Error getting TMDB images for %s: %s", tmdb_id, err)
+            _LOGGER.error("Error getting TMDB details for %s: %s", tmdb_id, err)
+            self._tmdb_failed = True
+            return None
+
+    async def _get_tmdb_images(self, tmdb_id, media_type='movie'):
+        """Get TMDB image URLs with varied options."""
+        details = await self._get_tmdb_details(tmdb_id, media_type)
+        if not details:
             return None, None, None
+        return (
+            proxy_image_url(self.hass, details['poster'], IMAGE_POSTER_WIDTH),
+            proxy_image_url(self.hass, details['backdrop'], IMAGE_BACKDROP_WIDTH),
+            proxy_image_url(self.hass, details['main_backdrop'], IMAGE_FANART_WIDTH),
+        )
 
-    async def _search_tmdb(self, title, year=None, media_type='movie'):
-        """Search for a title on TMDB."""
+    async def _search_tmdb(self, title, year=None, media_type='movie', raise_errors=False):
+        """Search for a title on TMDB.
+
+        Returns None when TMDB has no match. Errors are raised if
+        raise_errors is set; otherwise they set _tmdb_failed and return None.
+        """
         if not title:
             return None
             
+        cache_key = f"search_{media_type}_{title}_{year}"
         try:
-            cache_key = f"search_{media_type}_{title}_{year}"
-            if cache_key in self._cache:
-                return self._cache[cache_key]
+            return await self._cache.async_get_or_fetch(
+                cache_key,
+                lambda: self._fetch_tmdb_search(title, year, media_type),
+                TMDB_SEARCH_TTL
+            )
+        except Exception as err:
+            if raise_errors:
+                raise
+            _LOGGER.error("Error searching TMDB for %s: %s", title, err)
+            self._tmdb_failed = True
+            return None
 
-            params = {"query": title}
-            if year:
-                params["year"] = year
-            
-            endpoint = f"search/{media_type}"
-            results = await self._fetch_tmdb_data(endpoint, params)
-            
-            if results and results.get("results"):
-                tmdb_id = results["results"][0]["id"]
-                self._cache[cache_key] = tmdb_id
-                return tmdb_id
-            
+    async def _fetch_tmdb_search(self, title, year, media_type):
+        """Return the first TMDB search hit for a title."""
+        params = {"query": title}
+        if year:
+            params["year"] = year
+        
+        endpoint = f"search/{media_type}"
+        results = await self._fetch_tmdb_data(endpoint, params, raise_errors=True)
+        
+        if results and results.get("results"):
+            return results["results"][0]["id"]
+        
+        return None
+
+    async def _find_tmdb_id(self, external_id, external_source='tvdb_id', media_type='tv', raise_errors=False):
+        """Resolve an external ID (e.g. TVDB) to a TMDB ID.
+
+        Returns None when TMDB has no match. Errors are raised if
+        raise_errors is set; otherwise they set _tmdb_failed and return None.
+        """
+        if not external_id:
             return None
-            
+
+        cache_key = f"find_{external_source}_{media_type}_{external_id}"
+        try:
+            return await self._cache.async_get_or_fetch(
+                cache_key,
+                lambda: self._fetch_tmdb_find(external_id, external_source, media_type),
+                TMDB_FIND_TTL
+            )
         except Exception as err:
-            _LOGGER.error("Error searching TMDB for %s: %s", title, err)
+            if raise_errors:
+                raise
+            _LOGGER.error("Error finding TMDB ID for %s %s: %s", external_source, external_id, err)
+            self._tmdb_failed = True
             return None
 
+    async def _fetch_tmdb_find(self, external_id, external_source, media_type):
+        """Return the first TMDB match for an external ID."""
+        data = await self._fetch_tmdb_data(
+            f"find/{external_id}",
+            {"external_source": external_source},
+            raise_errors=True
+        )
+        results = (data or {}).get(f"{media_type}_results")
+        if results:
+            return results[0]["id"]
+        return None
+
     @abstractmethod
-    async def async_update(self):
-        """Update sensor state."""
+    async def _async_update_data(self):
+        """Fetch data from the backend and update sensor state."""
         pass
\ No newline at end of file
@@ -0,0 +1,57 @@
+"""Webhook receiver for Mediarr push updates from Sonarr and Radarr."""
+import logging
+from http import HTTPStatus
+from aiohttp import web
+from aiohttp.hdrs import METH_POST, METH_PUT
+from homeassistant.components import webhook
+from homeassistant.core import callback
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WebhookReceiver:
+    """Register a Home Assistant webhook and hand its events to a callback.
+
+    on_event is called with the eventType and the decoded payload of every
+    notification the *arr application sends.
+    """
+
+    def __init__(self, hass, webhook_id, name, on_event):
+        """Initialize the receiver."""
+        self._hass = hass
+        self._webhook_id = webhook_id
+        self._name = name
+        self._on_event = on_event
+        self.events = 0
+
+    @callback
+    def async_start(self):
+        """Register the webhook."""
+        webhook.async_register(
+            self._hass, DOMAIN, self._name, self._webhook_id, self._async_handle,
+            allowed_methods=[METH_POST, METH_PUT]
+        )
+
+    @callback
+    def async_stop(self):
+        """Unregister the webhook."""
+        webhook.async_unregister(self._hass, self._webhook_id)
+
+    async def _async_handle(self, hass, webhook_id, request):
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+        if not isinstance(data, dict):
+            _LOGGER.debug("%s webhook ignored a payload that is not an object", self._name)
+            return web.Response(status=HTTPStatus.BAD_REQUEST)
+
+        event_type = data.get('eventType')
+        self.events += 1
+        _LOGGER.debug("%s webhook received %s", self._name, event_type)
+        try:
+            self._on_event(event_type, data)
+        except Exception as err:
+            _LOGGER.error("Error handling %s webhook: %s", self._name, err)
+        return web.Response(status=HTTPStatus.OK)
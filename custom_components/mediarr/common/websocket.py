@@ -0,0 +1,119 @@
+"""Reconnecting websocket subscriptions for Mediarr push updates."""
+import asyncio
+import logging
+import random
+import aiohttp
+from homeassistant.core import callback
+from .const import WEBSOCKET_BACKOFF_MAX, WEBSOCKET_BACKOFF_MIN, WEBSOCKET_HEARTBEAT
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class WebsocketListener:
+    """Keep a websocket open and hand its JSON messages to a callback.
+
+    The connection is re-established with exponential backoff whenever it
+    drops. on_connect and on_disconnect let the owner switch between push
+    and polling.
+    """
+
+    def __init__(self, hass, session, url, name, on_message,
+                 on_connect=None, on_disconnect=None, headers=None, params=None):
+        """Initialize the listener."""
+        self._hass = hass
+        self._session = session
+        self._url = url
+        self._name = name
+        self._on_message = on_message
+        self._on_connect = on_connect
+        self._on_disconnect = on_disconnect
+        self._headers = headers
+        self._params = params
+        self._task = None
+        self._ws = None
+        self.connects = 0
+        self.messages = 0
+
+    @property
+    def connected(self):
+        """Return True while the websocket is open."""
+        return self._ws is not None and not self._ws.closed
+
+    @callback
+    def async_start(self):
+        """Start listening in the background."""
+        if self._task is None:
+            self._task = self._hass.async_create_background_task(
+                self._async_run(), f"mediarr {self._name} websocket"
+            )
+
+    @callback
+    def async_stop(self):
+        """Stop listening."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def async_send_json(self, data):
+        """Send a JSON message if connected."""
+        if self.connected:
+            await self._ws.send_json(data)
+
+    async def _async_run(self):
+        backoff = WEBSOCKET_BACKOFF_MIN
+        while True:
+            try:
+                async with self._session.ws_connect(
+                    self._url,
+                    headers=self._headers,
+                    params=self._params,
+                    heartbeat=WEBSOCKET_HEARTBEAT
+                ) as ws:
+                    self._ws = ws
+                    self.connects += 1
+                    backoff = WEBSOCKET_BACKOFF_MIN
+                    _LOGGER.debug("Connected to %s websocket", self._name)
+                    if self._on_connect:
+                        self._on_connect()
+                    await self._async_read(ws)
+            except asyncio.CancelledError:
+                raise
+            except Exception as err:
+                _LOGGER.debug("%s websocket error: %s", self._name, err)
+            finally:
+                if self._ws is not None:
+                    self._ws = None
+                    # Not when async_stop cancelled the listener
+                    if self._on_disconnect and self._task is not None:
+                        self._on_disconnect()
+
+            # Jitter so several sensors do not reconnect in lockstep
+            delay = backoff * random.uniform(0.8, 1.2)
+            _LOGGER.debug("%s websocket closed, reconnecting in %.0fs", self._name, delay)
+            await asyncio.sleep(delay)
+            backoff = min(backoff * 2, WEBSOCKET_BACKOFF_MAX)
+
+    async def _async_read(self, ws):
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                if msg.type == aiohttp.WSMsgType.ERROR:
+                    _LOGGER.debug("%s websocket error: %s", self._name, ws.exception())
+                break
+            try:
+                data = msg.json()
+            except ValueError:
+                continue
+            self.messages += 1
+            try:
+                self._on_message(data)
+            except Exception as err:
+                _LOGGER.error("Error handling %s websocket message: %s", self._name, err)
+
+    @property
+    def stats(self):
+        """Return connection counters."""
+        return {
+            'connected': self.connected,
+            'connects': self.connects,
+            'messages': self.messages,
+        }
@@ -1,8 +1,19 @@
 # mediarr/discovery/tmdb.py
 """TMDB integration for Mediarr."""
 
+import asyncio
 import logging
-from ..common.sensor import MediarrSensor
+import time
+from ..common.const import (
+    IMAGE_FANART_WIDTH,
+    IMAGE_POSTER_WIDTH,
+    TMDB_DISCOVERY_MAX_PAGES,
+    TMDB_PAGE_SIZE
+)
+from ..common.image_proxy import proxy_image_url
+from ..common.metrics import get_metrics
+from ..common.sensor import MediarrSensor, payload_fingerprint
+from ..common.tmdb_api import TMDB_IMAGE_BASE_URL, async_fetch_tmdb, async_get_tmdb_genres
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -14,14 +25,172 @@ TMDB_ENDPOINTS = {
     'airing_today': 'tv/airing_today'
 }
 
-class TMDBMediarrSensor(MediarrSensor):
-    def __init__(self, session, api_key, max_items, endpoint='trending'):
-        super().__init__()
+
+def _get_media_type(endpoint, item):
+    """Determine media type based on endpoint and item data."""
+    if endpoint in ['now_playing', 'upcoming']:
+        return 'movie'
+    elif endpoint in ['on_air', 'airing_today']:
+        return 'tv'
+    return item.get('media_type', 'movie')
+
+
+def _list_name(endpoint):
+    """Return the sensor name of a discovery list."""
+    return f"TMDB Mediarr {endpoint.replace('_', ' ').title()}"
+
+
+def _get_year(item, media_type):
+    """Extract year based on media type."""
+    if media_type == 'movie':
+        date = item.get('release_date', '')
+    else:
+        date = item.get('first_air_date', '')
+    return date.split('-')[0] if date else ''
+
+
+class TMDBDiscoveryFetcher:
+    """Fetch every enabled TMDB discovery list in one cycle.
+
+    Lists are paged until max_items titles are collected, and a title that
+    appears on several lists is turned into a card only once.
+    """
+
+    def __init__(self, session, api_key, max_items, endpoints):
+        """Initialize the fetcher."""
         self._session = session
         self._api_key = api_key
         self._max_items = max_items
+        self.endpoints = list(endpoints)
+        # Time spent fetching each list in the last cycle, in seconds
+        self.durations = {}
+
+    @property
+    def key(self):
+        """Return a key naming the lists this fetcher produces and their length."""
+        return f"{self._max_items}_{'_'.join(self.endpoints)}"
+
+    async def async_fetch(self, hass):
+        """Return the cards of every list with the number of titles found.
+
+        Lists that failed are None.
+        """
+        genres = await self._async_get_genres(hass)
+        cards = {}
+
+        async def _timed(endpoint):
+            started = time.monotonic()
+            try:
+                return await self._fetch_endpoint(hass, endpoint, genres, cards)
+            finally:
+                self.durations[endpoint] = time.monotonic() - started
+
+        results = await asyncio.gather(
+            *(_timed(endpoint) for endpoint in self.endpoints),
+            return_exceptions=True
+        )
+        data = {}
+        for endpoint, result in zip(self.endpoints, results):
+            if isinstance(result, Exception):
+                _LOGGER.error("Error fetching TMDB %s: %s", endpoint, result)
+                result = None
+            data[endpoint] = result
+        return data
+
+    async def _async_get_genres(self, hass):
+        genres = {}
+        for media_type in ('movie', 'tv'):
+            try:
+                genres[media_type] = await async_get_tmdb_genres(
+                    hass, self._session, self._api_key, media_type
+                ) or {}
+            except Exception as err:
+                _LOGGER.error("Error fetching TMDB %s genres: %s", media_type, err)
+                genres[media_type] = {}
+        return genres
+
+    async def _fetch_page(self, hass, endpoint, page):
+        data = await async_fetch_tmdb(
+            hass, self._session, self._api_key, TMDB_ENDPOINTS[endpoint], {'page': page}
+        )
+        return data or {}
+
+    async def _fetch_endpoint(self, hass, endpoint, genres, cards):
+        """Page through one list until max_items distinct titles are found.
+
+        Returns the first max_items cards along with how many titles the
+        fetched pages held.
+        """
+        results = []
+        seen = set()
+
+        def _add(data):
+            for item in data.get('results', []):
+                media_type = _get_media_type(endpoint, item)
+                key = (media_type, item.get('id'))
+                # Lists shift between page requests, so titles can repeat
+                if media_type not in ['movie', 'tv'] or key in seen:
+                    continue
+                seen.add(key)
+                card = cards.get(key)
+                if card is None:
+                    card = cards[key] = self._build_card(hass, item, media_type, genres)
+                results.append(card)
+
+        data = await self._fetch_page(hass, endpoint, 1)
+        _add(data)
+        total_pages = min(data.get('total_pages', 1), TMDB_DISCOVERY_MAX_PAGES)
+        page = 1
+        while len(results) < self._max_items and page < total_pages:
+            needed = min(-(-(self._max_items - len(results)) // TMDB_PAGE_SIZE), total_pages - page)
+            pages = await asyncio.gather(*(
+                self._fetch_page(hass, endpoint, page + offset) for offset in range(1, needed + 1)
+            ))
+            page += needed
+            for data in pages:
+                _add(data)
+        return results[:self._max_items], len(results)
+
+    def _build_card(self, hass, item, media_type, genres):
+        return {
+            'title': item.get('title') if media_type == 'movie' else item.get('name'),
+            'type': 'movie' if media_type == 'movie' else 'show',
+            'year': _get_year(item, media_type),
+            'overview': item.get('overview'),
+            'genres': [
+                genres[media_type][genre_id]
+                for genre_id in item.get('genre_ids', [])
+                if genre_id in genres[media_type]
+            ],
+            'poster': proxy_image_url(
+                hass,
+                f"{TMDB_IMAGE_BASE_URL}/w500{item.get('poster_path')}" if item.get('poster_path') else None,
+                IMAGE_POSTER_WIDTH
+            ),
+            'backdrop': proxy_image_url(
+                hass,
+                f"{TMDB_IMAGE_BASE_URL}/original{item.get('backdrop_path')}" if item.get('backdrop_path') else None,
+                IMAGE_FANART_WIDTH
+            ),
+            'tmdb_id': item.get('id'),
+            'popularity': item.get('popularity'),
+            'vote_average': item.get('vote_average')
+        }
+
+
+class TMDBMediarrSensor(MediarrSensor):
+    """Sensor for one TMDB discovery list.
+
+    Every list sensor shares one coordinator, whose update runs the shared
+    fetcher once and keeps each list's payload under its endpoint key.
+    """
+
+    def __init__(self, fetcher, endpoint='trending'):
+        super().__init__()
+        self._fetcher = fetcher
         self._endpoint = endpoint
-        self._name = f"TMDB Mediarr {endpoint.replace('_', ' ').title()}"
+        self._results = {}
+        self._name = _list_name(endpoint)
 
     @property
     def name(self):
@@ -31,61 +200,63 @@ class TMDBMediarrSensor(MediarrSensor):
     def unique_id(self):
         return f"tmdb_mediarr_{self._endpoint}"
 
-    async def async_update(self):
-        try:
-            headers = {
-                'Authorization': f'Bearer {self._api_key}',
-                'accept': 'application/json'
-            }
-            
-            endpoint_url = TMDB_ENDPOINTS.get(self._endpoint, TMDB_ENDPOINTS['trending'])
-            async with self._session.get(
-                f"https://api.themoviedb.org/3/{endpoint_url}",
-                headers=headers
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    results = []
-                    
-                    for item in data.get('results', []):
-                        media_type = self._get_media_type(item)
-                        if media_type in ['movie', 'tv']:
-                            results.append({
-                                'title': item.get('title') if media_type == 'movie' else item.get('name'),
-                                'type': 'movie' if media_type == 'movie' else 'show',
-                                'year': self._get_year(item, media_type),
-                                'overview': item.get('overview'),
-                                'poster': f"https://image.tmdb.org/t/p/w500{item.get('poster_path')}" if item.get('poster_path') else None,
-                                'backdrop': f"https://image.tmdb.org/t/p/original{item.get('backdrop_path')}" if item.get('backdrop_path') else None,
-                                'tmdb_id': item.get('id'),
-                                'popularity': item.get('popularity'),
-                                'vote_average': item.get('vote_average')
-                            })
-                    
-                    self._state = len(results)
-                    self._attributes = {'data': results[:self._max_items]}
-                    self._available = True
-                else:
-                    raise Exception(f"Failed to fetch TMDB {self._endpoint}. Status: {response.status}")
-
-        except Exception as err:
-            _LOGGER.error("Error updating TMDB sensor: %s", err)
+    @property
+    def coordinator_key(self):
+        """Return the key shared by every list sensor of the fetcher."""
+        return f"tmdb_mediarr_{self._fetcher.key}"
+
+    async def _async_update_data(self):
+        """Fetch every list; the sensor is available if any list succeeded."""
+        self._results = await self._fetcher.async_fetch(self.hass)
+        cards, count = self._results.get(self._endpoint) or ([], 0)
+        # The state counts every title found, not only those on the card
+        self._state = count
+        self._attributes = {'data': cards}
+        self._available = any(result is not None for result in self._results.values())
+
+    async def _async_coordinator_update(self):
+        """Run an update and return the payload of every list."""
+        payload = await super()._async_coordinator_update()
+        data = {}
+        for endpoint, result in self._results.items():
+            if result is None:
+                data[endpoint] = None
+            elif endpoint == self._endpoint:
+                data[endpoint] = payload
+            else:
+                cards, count = result
+                attributes = {'data': cards}
+                data[endpoint] = {
+                    'state': count,
+                    'attributes': attributes,
+                    'fingerprint': payload_fingerprint(count, attributes),
+                }
+        return data
+
+    def _record_update(self, duration):
+        """Record each list under its own sensor, timed by how long it took to fetch."""
+        metrics = get_metrics(self.hass)
+        for endpoint in self._fetcher.endpoints:
+            metrics.record_update(
+                f"tmdb_mediarr_{endpoint}",
+                _list_name(endpoint),
+                self._fetcher.durations.get(endpoint, duration),
+                self._results.get(endpoint) is not None
+            )
+
+    def _apply_coordinator_data(self):
+        """Copy this list's payload from the shared coordinator result."""
+        coordinator = self.coordinator
+        if coordinator.data is None and coordinator.last_update_success:
+            return
+        payload = (coordinator.data or {}).get(self._endpoint)
+        if not coordinator.last_update_success or payload is None:
             self._state = 0
             self._attributes = {'data': []}
             self._available = False
-
-    def _get_media_type(self, item):
-        """Determine media type based on endpoint and item data."""
-        if self._endpoint in ['now_playing', 'upcoming']:
-            return 'movie'
-        elif self._endpoint in ['on_air', 'airing_today']:
-            return 'tv'
-        return item.get('media_type', 'movie')
-
-    def _get_year(self, item, media_type):
-        """Extract year based on media type."""
-        if media_type == 'movie':
-            date = item.get('release_date', '')
+            self._fingerprint = None
         else:
-            date = item.get('first_air_date', '')
-        return date.split('-')[0] if date else ''
+            self._state = payload['state']
+            self._attributes = payload['attributes']
+            self._available = True
+            self._fingerprint = payload['fingerprint']
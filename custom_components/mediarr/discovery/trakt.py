@@ -1,11 +1,150 @@
 # mediarr/discovery/trakt.py
 """Trakt integration for Mediarr."""
 
+import asyncio
 import logging
+import time
+import aiohttp
+import async_timeout
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+from ..common.const import (
+    DOMAIN,
+    IMAGE_FANART_WIDTH,
+    IMAGE_POSTER_WIDTH,
+    TRAKT_AUTH_RETRY,
+    TRAKT_BACKOFF_MAX,
+    TRAKT_BACKOFF_MIN,
+    TRAKT_ENRICH_CONCURRENCY,
+    TRAKT_MAX_ATTEMPTS,
+    TRAKT_PAGE_LIMIT,
+    TRAKT_TOKEN_REFRESH_MARGIN
+)
+from ..common.concurrency import async_gather_bounded
+from ..common.image_proxy import proxy_image_url
 from ..common.sensor import MediarrSensor
+from ..common.session import UPSTREAM_TMDB, async_get_session
+from ..common.tmdb_api import async_get_tmdb_details
 
 _LOGGER = logging.getLogger(__name__)
 
+TRAKT_API_URL = "https://api.trakt.tv"
+
+TOKEN_STORAGE_VERSION = 1
+
+
+def _retry_after(response, default):
+    """Return the Retry-After delay of a response in seconds."""
+    try:
+        return min(max(float(response.headers.get('Retry-After')), 0), TRAKT_BACKOFF_MAX)
+    except (TypeError, ValueError):
+        return default
+
+
+class TraktToken:
+    """Persistent Trakt access token, renewed before it expires.
+
+    Concurrent callers share one token request, and a failed
+    authentication is not retried before TRAKT_AUTH_RETRY has passed.
+    """
+
+    def __init__(self, hass, session, client_id, client_secret, headers):
+        """Initialize the token."""
+        self._store = Store(hass, TOKEN_STORAGE_VERSION, f"{DOMAIN}.trakt_token_{slugify(client_id)}")
+        self._session = session
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._headers = headers
+        self._lock = asyncio.Lock()
+        self._loaded = False
+        self._token = None
+        self._retry_at = 0
+
+    async def _async_load(self):
+        self._loaded = True
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.error("Error loading Trakt token: %s", err)
+            return
+        if data and data.get('access_token'):
+            self._token = data
+
+    def _is_fresh(self):
+        if self._token is None:
+            return False
+        expires_at = self._token.get('expires_at')
+        if expires_at is None:
+            # No expiry given; keep the token until the API rejects it
+            return True
+        # Short lived tokens are renewed halfway through instead
+        margin = min(TRAKT_TOKEN_REFRESH_MARGIN.total_seconds(), self._token.get('lifetime', 0) / 2)
+        return expires_at - margin > time.time()
+
+    async def async_get(self):
+        """Return a valid access token, or None when authentication fails."""
+        async with self._lock:
+            if not self._loaded:
+                await self._async_load()
+            if self._is_fresh():
+                return self._token['access_token']
+            if time.time() < self._retry_at:
+                return None
+
+            token = None
+            if self._token and self._token.get('refresh_token'):
+                token = await self._async_request_token({
+                    'grant_type': 'refresh_token',
+                    'refresh_token': self._token['refresh_token']
+                })
+            if token is None:
+                token = await self._async_request_token({'grant_type': 'client_credentials'})
+            if token is None:
+                self._retry_at = time.time() + TRAKT_AUTH_RETRY.total_seconds()
+                return None
+
+            self._token = token
+            self._store.async_delay_save(lambda: self._token)
+            return token['access_token']
+
+    def invalidate(self, access_token):
+        """Drop a token the API rejected, unless it was already replaced."""
+        if self._token and self._token.get('access_token') == access_token:
+            self._token = None
+
+    async def _async_request_token(self, data):
+        try:
+            data.update({
+                'client_id': self._client_id,
+                'client_secret': self._client_secret
+            })
+            async with async_timeout.timeout(10):
+                async with self._session.post(
+                    f"{TRAKT_API_URL}/oauth/token",
+                    json=data,
+                    headers=self._headers
+                ) as response:
+                    if response.status != 200:
+                        _LOGGER.error("Error getting Trakt access token: %s", response.status)
+                        return None
+                    token_data = await response.json()
+        except Exception as err:
+            _LOGGER.error("Error getting Trakt access token: %s", err)
+            return None
+
+        if not token_data.get('access_token'):
+            return None
+        # Expiry is tracked on the local clock so server clock skew cannot
+        # make a new token look stale
+        lifetime = token_data.get('expires_in')
+        return {
+            'access_token': token_data['access_token'],
+            'refresh_token': token_data.get('refresh_token'),
+            'expires_at': time.time() + lifetime if lifetime is not None else None,
+            'lifetime': lifetime
+        }
+
+
 class TraktMediarrSensor(MediarrSensor):
     def __init__(self, session, client_id, client_secret, trending_type, max_items, tmdb_api_key):
         super().__init__()
@@ -16,7 +155,7 @@ class TraktMediarrSensor(MediarrSensor):
         self._max_items = max_items
         self._tmdb_api_key = tmdb_api_key
         self._name = "Trakt Mediarr"
-        self._access_token = None
+        self._token = None
         self._headers = {
             'Content-Type': 'application/json',
             'trakt-api-version': '2',
@@ -32,70 +171,90 @@ class TraktMediarrSensor(MediarrSensor):
         return f"trakt_mediarr_{self._trending_type}"
 
     async def _get_access_token(self):
-        try:
-            data = {
-                'client_id': self._client_id,
-                'client_secret': self._client_secret,
-                'grant_type': 'client_credentials'
-            }
-
-            async with self._session.post(
-                'https://api.trakt.tv/oauth/token',
-                json=data,
-                headers=self._headers
-            ) as response:
-                if response.status == 200:
-                    token_data = await response.json()
-                    self._access_token = token_data.get('access_token')
-                    if self._access_token:
-                        self._headers['Authorization'] = f'Bearer {self._access_token}'
-                        self._available = True
-                        return True
-                return False
-        except Exception as err:
-            _LOGGER.error("Error getting Trakt access token: %s", err)
-            return False
+        if self._token is None:
+            self._token = TraktToken(
+                self.hass, self._session, self._client_id, self._client_secret, self._headers
+            )
+        return await self._token.async_get()
 
     async def _fetch_popular(self, media_type):
-        try:
-            params = {'limit': self._max_items}
-            
-            async with self._session.get(
-                f"https://api.trakt.tv/{media_type}/popular",
-                headers=self._headers,
-                params=params
-            ) as response:
-                if response.status == 200:
-                    return await response.json()
-                elif response.status in [401, 403]:
-                    if await self._get_access_token():
-                        return await self._fetch_popular(media_type)
-                return []
-        except Exception as err:
-            _LOGGER.error("Error fetching Trakt %s: %s", media_type, err)
-            return []
+        """Fetch up to max_items of a popular list.
+
+        The first page reports the page count, the remaining pages are then
+        fetched concurrently.
+        """
+        limit = min(self._max_items, TRAKT_PAGE_LIMIT)
+        items, page_count = await self._fetch_page(media_type, 1, limit)
+        pages = min(page_count, -(-self._max_items // limit))
+        if pages > 1:
+            results = await asyncio.gather(*(
+                self._fetch_page(media_type, page, limit) for page in range(2, pages + 1)
+            ))
+            for page_items, _ in results:
+                items.extend(page_items)
+        return items[:self._max_items]
+
+    async def _fetch_page(self, media_type, page, limit):
+        """Fetch one page of a popular list, retrying a few times with backoff.
+
+        A rejected token is renewed once per attempt; rate limits and
+        server errors wait for Retry-After or an exponential delay.
+        Returns the items and the page count reported by Trakt.
+        """
+        params = {'page': page, 'limit': limit}
+        for attempt in range(TRAKT_MAX_ATTEMPTS):
+            access_token = await self._get_access_token()
+            if access_token is None:
+                return [], 0
+
+            delay = min(TRAKT_BACKOFF_MIN * 2 ** attempt, TRAKT_BACKOFF_MAX)
+            try:
+                async with async_timeout.timeout(10):
+                    async with self._session.get(
+                        f"{TRAKT_API_URL}/{media_type}/popular",
+                        headers={**self._headers, 'Authorization': f'Bearer {access_token}'},
+                        params=params
+                    ) as response:
+                        if response.status == 200:
+                            try:
+                                page_count = int(response.headers.get('X-Pagination-Page-Count', 1))
+                            except ValueError:
+                                page_count = 1
+                            return await response.json(), page_count
+                        if response.status in [401, 403]:
+                            self._token.invalidate(access_token)
+                            delay = 0
+                        elif response.status == 429 or response.status >= 500:
+                            delay = _retry_after(response, delay)
+                        else:
+                            _LOGGER.error("Error fetching Trakt %s: %s", media_type, response.status)
+                            return [], 0
+                        _LOGGER.debug(
+                            "Trakt %s returned %s (attempt %d)", media_type, response.status, attempt + 1
+                        )
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                _LOGGER.debug("Error fetching Trakt %s (attempt %d): %s", media_type, attempt + 1, err)
+
+            if attempt + 1 < TRAKT_MAX_ATTEMPTS:
+                await asyncio.sleep(delay)
+
+        _LOGGER.error("Error fetching Trakt %s: giving up after %d attempts", media_type, TRAKT_MAX_ATTEMPTS)
+        return [], 0
 
     async def _fetch_tmdb_data(self, tmdb_id, media_type):
         try:
             endpoint = 'tv' if media_type == 'show' else 'movie'
-            headers = {
-                'Authorization': f'Bearer {self._tmdb_api_key}',
-                'accept': 'application/json'
-            }
-            
-            async with self._session.get(
-                f"https://api.themoviedb.org/3/{endpoint}/{tmdb_id}",
-                headers=headers
-            ) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return {
-                        'poster': f"https://image.tmdb.org/t/p/w500{data.get('poster_path')}" if data.get('poster_path') else None,
-                        'backdrop': f"https://image.tmdb.org/t/p/original{data.get('backdrop_path')}" if data.get('backdrop_path') else None,
-                        'overview': data.get('overview'),
-                        'genres': [g['name'] for g in data.get('genres', [])]
-                    }
-                return {}
+            details = await async_get_tmdb_details(
+                self.hass, async_get_session(self.hass, UPSTREAM_TMDB), self._tmdb_api_key, tmdb_id, endpoint
+            )
+            if details:
+                return {
+                    'poster': proxy_image_url(self.hass, details['canonical_poster'], IMAGE_POSTER_WIDTH),
+                    'backdrop': proxy_image_url(self.hass, details['canonical_backdrop'], IMAGE_FANART_WIDTH),
+                    'overview': details['overview'],
+                    'genres': details['genres']
+                }
+            return {}
         except Exception as err:
             _LOGGER.error("Error fetching TMDB data: %s", err)
             return {}
@@ -122,29 +281,34 @@ class TraktMediarrSensor(MediarrSensor):
             _LOGGER.error("Error processing Trakt item: %s", err)
             return None
 
-    async def async_update(self):
+    async def _async_update_data(self):
         try:
-            if not self._access_token and not await self._get_access_token():
+            if not await self._get_access_token():
                 self._state = None
                 self._attributes = {}
                 self._available = False
                 return
 
-            all_items = []
-            
+            media_types = []
             if self._trending_type in ['shows', 'both']:
-                shows = await self._fetch_popular('shows')
-                for item in shows:
-                    processed = await self._process_item(item, 'show')
-                    if processed:
-                        all_items.append(processed)
-            
+                media_types.append(('shows', 'show'))
             if self._trending_type in ['movies', 'both']:
-                movies = await self._fetch_popular('movies')
-                for item in movies:
-                    processed = await self._process_item(item, 'movie')
-                    if processed:
-                        all_items.append(processed)
+                media_types.append(('movies', 'movie'))
+
+            lists = await asyncio.gather(*(
+                self._fetch_popular(list_type) for list_type, _ in media_types
+            ))
+
+            # TMDB details are cached per title, so only new entries cost a request
+            entries = [
+                (item, media_type)
+                for (_, media_type), items in zip(media_types, lists)
+                for item in items
+            ]
+            processed = await async_gather_bounded(
+                entries, lambda entry: self._process_item(*entry), TRAKT_ENRICH_CONCURRENCY
+            )
+            all_items = [item for item in processed if item]
             
             if all_items:
                 self._state = len(all_items)
@@ -159,4 +323,4 @@ class TraktMediarrSensor(MediarrSensor):
             _LOGGER.error("Error updating Trakt sensor: %s", err)
             self._state = None
             self._attributes = {'data': []}
-            self._available = False
+            self._available = False
\ No newline at end of file
@@ -1,133 +1,344 @@
 """Radarr integration for Mediarr using TMDB images."""
+import asyncio
+import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 import async_timeout
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from ..common.conditional import PayloadTracker
+from ..common.const import (
+    DEFAULT_DAYS,
+    PUSH_DEBOUNCE,
+    PUSH_SCAN_INTERVAL,
+    RADARR_MODE_CALENDAR,
+    RADARR_MODE_LIBRARY,
+    RADARR_RECONCILE_INTERVAL,
+    RADARR_WEBHOOK_MAX_FETCHES
+)
 from ..common.tmdb_sensor import TMDBMediaSensor
+from ..common.webhook import WebhookReceiver
 
 _LOGGER = logging.getLogger(__name__)
 
+# Webhook events after which a movie can no longer be upcoming
+WEBHOOK_REMOVE_EVENTS = ('Download', 'MovieDelete')
+# Webhook events after which a movie has to be looked up again
+WEBHOOK_UPDATE_EVENTS = ('MovieAdded', 'MovieFileDelete')
+
 class RadarrMediarrSensor(TMDBMediaSensor):
-    def __init__(self, session, api_key, url, tmdb_api_key, max_items, cf_client_id, cf_client_secret):
+    def __init__(self, session, api_key, url, tmdb_api_key, max_items, cf_client_id, cf_client_secret,
+                 days_to_check=DEFAULT_DAYS, fetch_mode=RADARR_MODE_CALENDAR, webhook_id=None):
         """Initialize the sensor."""
         super().__init__(session, tmdb_api_key)
         self._radarr_api_key = api_key
         self._url = url.rstrip('/')
         self._max_items = max_items
+        self._days_to_check = days_to_check
+        self._fetch_mode = fetch_mode
         self._name = "Radarr Mediarr"
         self._cf_client_id = cf_client_id
         self._cf_client_secret = cf_client_secret
-        
+        # Monitored, file-less movies keyed by Radarr movie id
+        self._movies = {}
+        self._last_reconcile = None
+        # Earliest release on the card; once it passes the card is stale
+        self._rebuild_at = None
+        self._payloads = PayloadTracker()
+        self._webhook_id = webhook_id
+        self._push_debouncer = None
+        # Movie IDs announced by webhooks, and those the next update applies
+        self._pending_updated = set()
+        self._pending_removed = set()
+        self._push_changes = None
+
     @property
     def name(self):
         """Return the name of the sensor."""
         return self._name
 
+    async def async_added_to_hass(self):
+        """Listen for Radarr webhooks when a webhook ID is configured."""
+        await super().async_added_to_hass()
+        if not self._webhook_id:
+            return
+        self._push_debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=PUSH_DEBOUNCE, immediate=False,
+            function=self._async_push_refresh
+        )
+        receiver = WebhookReceiver(self.hass, self._webhook_id, self.name, self._handle_webhook_event)
+        receiver.async_start()
+        self.async_on_remove(receiver.async_stop)
+        self.async_on_remove(self._push_debouncer.async_cancel)
+        # Webhooks announce changes; keep polling only as a safety net
+        self.coordinator.update_interval = PUSH_SCAN_INTERVAL
+
+    @callback
+    def _handle_webhook_event(self, event_type, data):
+        """Collect the movies a webhook event affects."""
+        movie_id = (data.get('movie') or {}).get('id')
+        if movie_id is None:
+            return
+        if event_type in WEBHOOK_REMOVE_EVENTS:
+            self._pending_updated.discard(movie_id)
+            self._pending_removed.add(movie_id)
+        elif event_type in WEBHOOK_UPDATE_EVENTS:
+            self._pending_removed.discard(movie_id)
+            self._pending_updated.add(movie_id)
+        else:
+            return
+        self._push_debouncer.async_schedule_call()
+
+    async def _async_push_refresh(self):
+        """Apply the webhook changes collected since the last refresh."""
+        self._push_changes = (self._pending_updated, self._pending_removed)
+        self._pending_updated = set()
+        self._pending_removed = set()
+        await self.coordinator.async_refresh()
+
     @property
     def unique_id(self):
         """Return a unique ID."""
         return f"radarr_mediarr_{self._url}"
 
-    async def async_update(self):
+    def _headers(self):
+        return {
+            'X-Api-Key': self._radarr_api_key,
+            "CF-Access-Client-Id": self._cf_client_id,
+            "CF-Access-Client-Secret": self._cf_client_secret,
+            }
+
+    async def _fetch_json(self, path, params=None):
+        """Fetch a JSON document from the Radarr API.
+
+        Returns None when the payload is unchanged since it was last
+        processed.
+        """
+        url = f"{self._url}{path}"
+        headers = self._headers()
+        headers.update(self._payloads.request_headers(url))
+        async with async_timeout.timeout(10):
+            async with self._session.get(
+                url,
+                headers=headers,
+                params=params
+            ) as response:
+                if response.status not in (200, 304):
+                    _LOGGER.error("Radarr API error: %s - Response: %s",
+                                response.status, await response.text())
+                    raise Exception(f"Failed to connect to Radarr. Status: {response.status}")
+                body = await response.read()
+                if not self._payloads.check(url, response, body):
+                    return None
+                return json.loads(body)
+
+    async def _fetch_movie(self, movie_id):
+        """Fetch a single movie, or None when it no longer exists."""
+        async with async_timeout.timeout(10):
+            async with self._session.get(
+                f"{self._url}/api/v3/movie/{movie_id}",
+                headers=self._headers()
+            ) as response:
+                if response.status == 404:
+                    return None
+                if response.status != 200:
+                    raise Exception(f"Failed to fetch Radarr movie {movie_id}. Status: {response.status}")
+                return await response.json()
+
+    async def _apply_webhook_changes(self, updated, removed):
+        """Apply webhook changes to the movie index.
+
+        Returns False when no tracked movie changed.
+        """
+        changed = False
+        for movie_id in removed:
+            changed = self._movies.pop(movie_id, None) is not None or changed
+
+        movies = await asyncio.gather(*(self._fetch_movie(movie_id) for movie_id in updated))
+        for movie_id, movie in zip(updated, movies):
+            if movie is not None and self._is_candidate(movie):
+                self._movies[movie_id] = movie
+                changed = True
+            elif self._movies.pop(movie_id, None) is not None:
+                changed = True
+        return changed
+
+    @staticmethod
+    def _is_candidate(movie):
+        """Return True for monitored movies that are not downloaded yet."""
+        return movie.get('monitored', False) and not movie.get('hasFile', False)
+
+    def _next_release(self, movie, now):
+        """Return the earliest future (release_type, release_date) of a movie."""
+        release_dates = []
+        for date_field, date_type in [
+            ('digitalRelease', 'Digital'),
+            ('physicalRelease', 'Physical'),
+            ('inCinemas', 'Theaters')
+        ]:
+            if movie.get(date_field):
+                try:
+                    release_date = datetime.fromisoformat(
+                        movie[date_field].replace('Z', '+00:00')
+                    )
+                    if not release_date.tzinfo:
+                        release_date = release_date.replace(tzinfo=now.tzinfo)
+                    if release_date > now:
+                        release_dates.append((date_type, release_date))
+                except ValueError as e:
+                    _LOGGER.warning("Error parsing date for movie %s: %s",
+                                movie.get('title', 'Unknown'), e)
+                    continue
+
+        if not release_dates:
+            return None
+        release_dates.sort(key=lambda x: x[1])
+        return release_dates[0]
+
+    async def _reconcile_library(self, now):
+        """Rebuild the movie index from the full Radarr library.
+
+        Returns False when the library is unchanged since the last scan.
+        """
+        movies = await self._fetch_json("/api/v3/movie")
+        self._last_reconcile = now
+        if movies is None:
+            return False
+        _LOGGER.debug("Received %d movies from Radarr", len(movies))
+        self._movies = {
+            movie['id']: movie for movie in movies if self._is_candidate(movie)
+        }
+        return True
+
+    async def _refresh_calendar(self, now):
+        """Update the movie index from the upcoming calendar window only.
+
+        Returns False when the calendar is unchanged since the last poll.
+        """
+        end = now + timedelta(days=self._days_to_check)
+        movies = await self._fetch_json("/api/v3/calendar", {
+            'start': now.strftime('%Y-%m-%d'),
+            'end': end.strftime('%Y-%m-%d'),
+            'unmonitored': 'false'
+        })
+        if movies is None:
+            return False
+        _LOGGER.debug("Received %d calendar movies from Radarr", len(movies))
+
+        seen = set()
+        for movie in movies:
+            seen.add(movie['id'])
+            if self._is_candidate(movie):
+                self._movies[movie['id']] = movie
+            else:
+                self._movies.pop(movie['id'], None)
+
+        # Anything releasing inside the window must have been returned; if it
+        # was not, it was deleted, unmonitored or rescheduled
+        for movie_id, movie in list(self._movies.items()):
+            if movie_id in seen:
+                continue
+            release = self._next_release(movie, now)
+            if release is None or release[1] <= end:
+                del self._movies[movie_id]
+        return True
+
+    async def _async_update_data(self):
         """Update the sensor."""
         try:
-            headers = {
-                'X-Api-Key': self._radarr_api_key,
-                "CF-Access-Client-Id": self._cf_client_id,
-                "CF-Access-Client-Secret": self._cf_client_secret,
-                }
             _LOGGER.debug("Fetching Radarr data from %s", self._url)
             now = datetime.now().astimezone()
-            
-            async with async_timeout.timeout(10):
-                async with self._session.get(
-                    f"{self._url}/api/v3/movie",
-                    headers=headers
-                ) as response:
-                    if response.status != 200:
-                        _LOGGER.error("Radarr API error: %s - Response: %s", 
-                                    response.status, await response.text())
-                        raise Exception(f"Failed to connect to Radarr. Status: {response.status}")
-                    
-                    movies = await response.json()
-                    _LOGGER.debug("Received %d movies from Radarr", len(movies))
-                    card_json = []
-                    upcoming_movies = []
-
-                    for movie in movies:
-                        if not movie.get('monitored', False) or movie.get('hasFile', False):
-                            continue
-
-                        release_dates = []
-                        for date_field, date_type in [
-                            ('digitalRelease', 'Digital'),
-                            ('physicalRelease', 'Physical'),
-                            ('inCinemas', 'Theaters')
-                        ]:
-                            if movie.get(date_field):
-                                try:
-                                    release_date = datetime.fromisoformat(
-                                        movie[date_field].replace('Z', '+00:00')
-                                    )
-                                    if not release_date.tzinfo:
-                                        release_date = release_date.replace(tzinfo=now.tzinfo)
-                                    if release_date > now:
-                                        release_dates.append((date_type, release_date))
-                                except ValueError as e:
-                                    _LOGGER.warning("Error parsing date for movie %s: %s", 
-                                                movie.get('title', 'Unknown'), e)
-                                    continue
-
-                        if release_dates:
-                            release_dates.sort(key=lambda x: x[1])
-                            release_type, release_date = release_dates[0]
-
-                            # Get TMDB ID or search for it
-                            tmdb_id = movie.get('tmdbId')
-                            if not tmdb_id:
-                                tmdb_id = await self._search_tmdb(
-                                    movie['title'],
-                                    movie.get('year'),
-                                    'movie'
-                                )
-
-                            # Get TMDB images
-                            poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'movie') if tmdb_id else (None, None, None)
-
-                            movie_data = {
-                                "title": str(movie["title"]),
-                                "release": f"{release_type} - {release_date.strftime('%Y-%m-%d')}",
-                                "aired": release_date.strftime("%Y-%m-%d"),
-                                "year": str(movie["year"]),
-                                "poster": str(poster_url or ""),  # Thumbnail in list
-                                "fanart": str(main_backdrop_url or backdrop_url or ""),  # Main display image
-                                "banner": str(backdrop_url or ""),  # Additional image if needed
-                                "genres": ", ".join(str(g) for g in movie.get("genres", [])[:3]),
-                                "runtime": str(movie.get("runtime", 0)),
-                                "rating": str(movie.get("ratings", {}).get("value", "")),
-                                "studio": str(movie.get("studio", "N/A")),
-                                "flag": 1
-                            }
-                            upcoming_movies.append(movie_data)
-
-                    upcoming_movies.sort(key=lambda x: x['aired'])
-                    card_json.extend(upcoming_movies[:self._max_items])
-
-                    if not card_json:
-                        card_json.append({
-                            'title_default': '$title',
-                            'line1_default': '$release',
-                            'line2_default': '$genres',
-                            'line3_default': '$rating - $runtime',
-                            'line4_default': '$studio',
-                            'icon': 'mdi:arrow-down-circle'
-                        })
-
-                    self._state = len(upcoming_movies)
-                    self._attributes = {'data': card_json}
-                    self._available = True
+            self._tmdb_failed = False
+            changes, self._push_changes = self._push_changes, None
+            changed = None
+
+            if (
+                changes is not None
+                and self._last_reconcile is not None
+                and len(changes[0]) <= RADARR_WEBHOOK_MAX_FETCHES
+            ):
+                try:
+                    changed = await self._apply_webhook_changes(*changes)
+                except Exception as err:
+                    _LOGGER.error("Error applying Radarr webhook changes, rescanning library: %s", err)
+                    self._last_reconcile = None
+
+            if changed is None:
+                if (
+                    self._fetch_mode == RADARR_MODE_LIBRARY
+                    or self._last_reconcile is None
+                    or now - self._last_reconcile >= RADARR_RECONCILE_INTERVAL
+                    or changes is not None
+                ):
+                    changed = await self._reconcile_library(now)
+                else:
+                    changed = await self._refresh_calendar(now)
+
+            if not changed and (self._rebuild_at is None or now < self._rebuild_at):
+                _LOGGER.debug("Radarr payload unchanged, skipping update")
+                return
+
+            card_json = []
+            upcoming_movies = []
+
+            for movie in self._movies.values():
+                release = self._next_release(movie, now)
+                if release:
+                    upcoming_movies.append((movie, *release))
+
+            upcoming_movies.sort(key=lambda x: x[2])
+            self._rebuild_at = upcoming_movies[0][2] if upcoming_movies else None
+
+            # Only the movies shown on the card need TMDB images
+            for movie, release_type, release_date in upcoming_movies[:self._max_items]:
+                # Get TMDB ID or search for it
+                tmdb_id = movie.get('tmdbId')
+                if not tmdb_id:
+                    tmdb_id = await self._search_tmdb(
+                        movie['title'],
+                        movie.get('year'),
+                        'movie'
+                    )
+
+                # Get TMDB images
+                poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'movie') if tmdb_id else (None, None, None)
+
+                card_json.append({
+                    "title": str(movie["title"]),
+                    "release": f"{release_type} - {release_date.strftime('%Y-%m-%d')}",
+                    "aired": release_date.strftime("%Y-%m-%d"),
+                    "year": str(movie["year"]),
+                    "poster": str(poster_url or ""),  # Thumbnail in list
+                    "fanart": str(main_backdrop_url or backdrop_url or ""),  # Main display image
+                    "banner": str(backdrop_url or ""),  # Additional image if needed
+                    "genres": ", ".join(str(g) for g in movie.get("genres", [])[:3]),
+                    "runtime": str(movie.get("runtime", 0)),
+                    "rating": str(movie.get("ratings", {}).get("value", "")),
+                    "studio": str(movie.get("studio", "N/A")),
+                    "flag": 1
+                })
+
+            if not card_json:
+                card_json.append({
+                    'title_default': '$title',
+                    'line1_default': '$release',
+                    'line2_default': '$genres',
+                    'line3_default': '$rating - $runtime',
+                    'line4_default': '$studio',
+                    'icon': 'mdi:arrow-down-circle'
+                })
+
+            self._state = len(upcoming_movies)
+            self._attributes = {'data': card_json}
+            self._available = True
+            if not self._tmdb_failed:
+                # Otherwise the cards are rebuilt again next poll
+                for url in (f"{self._url}/api/v3/movie", f"{self._url}/api/v3/calendar"):
+                    self._payloads.store(url, True)
 
         except Exception as err:
             _LOGGER.error("Error updating Radarr sensor: %s", err)
+            self._payloads.clear()
             self._state = 0
             self._attributes = {'data': []}
             self._available = False
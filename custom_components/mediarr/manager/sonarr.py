@@ -1,14 +1,77 @@
 """Sonarr integration for Mediarr using TMDB images."""
+import json
 import logging
+import time
 from datetime import datetime, timedelta
 import async_timeout
 from zoneinfo import ZoneInfo
+from homeassistant.core import callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.storage import Store
+from homeassistant.util import slugify
+from ..common.conditional import PayloadTracker
+from ..common.const import (
+    DOMAIN,
+    PUSH_DEBOUNCE,
+    PUSH_SCAN_INTERVAL,
+    SONARR_INDEX_RETRY,
+    SONARR_INDEX_SAVE_DELAY
+)
 from ..common.tmdb_sensor import TMDBMediaSensor
+from ..common.webhook import WebhookReceiver
 
 _LOGGER = logging.getLogger(__name__)
 
+INDEX_STORAGE_VERSION = 1
+
+# Webhook events that can change the upcoming calendar
+WEBHOOK_REFRESH_EVENTS = ('SeriesAdd', 'SeriesDelete', 'Download', 'EpisodeFileDelete')
+
+
+class SonarrSeriesIndex:
+    """Persistent Sonarr series to TMDB ID mapping."""
+
+    def __init__(self, hass, url):
+        """Initialize the index."""
+        self._store = Store(hass, INDEX_STORAGE_VERSION, f"{DOMAIN}.sonarr_index_{slugify(url)}")
+        self._series = {}
+
+    async def async_load(self):
+        """Load the index from storage."""
+        try:
+            data = await self._store.async_load()
+        except Exception as err:
+            _LOGGER.error("Error loading Sonarr series index: %s", err)
+            return
+        self._series = (data or {}).get('series', {})
+        _LOGGER.debug("Loaded %d series from the Sonarr index", len(self._series))
+
+    def lookup(self, series_id, tvdb_id):
+        """Return (known, tmdb_id) for a Sonarr series.
+
+        An entry is stale when Sonarr reports a different TVDB ID for the
+        series, or when it recorded a failed lookup that is due for a retry.
+        """
+        entry = self._series.get(str(series_id))
+        if entry is None or entry.get('tvdb_id') != tvdb_id:
+            return False, None
+        if not entry.get('tmdb_id') and entry.get('checked', 0) + SONARR_INDEX_RETRY.total_seconds() < time.time():
+            return False, None
+        return True, entry.get('tmdb_id')
+
+    def update(self, series_id, tvdb_id, tmdb_id):
+        """Record a resolved series and schedule a save."""
+        self._series[str(series_id)] = {
+            'tvdb_id': tvdb_id,
+            'tmdb_id': tmdb_id,
+            'checked': time.time()
+        }
+        self._store.async_delay_save(lambda: {'series': self._series}, SONARR_INDEX_SAVE_DELAY)
+
+
 class SonarrMediarrSensor(TMDBMediaSensor):
-    def __init__(self, session, api_key, url, tmdb_api_key, max_items, days_to_check, cf_client_id, cf_client_secret):
+    def __init__(self, session, api_key, url, tmdb_api_key, max_items, days_to_check, cf_client_id, cf_client_secret,
+                 webhook_id=None):
         """Initialize the sensor."""
         super().__init__(session, tmdb_api_key)
         self._sonarr_api_key = api_key
@@ -18,12 +81,39 @@ class SonarrMediarrSensor(TMDBMediaSensor):
         self._name = "Sonarr Mediarr"
         self._cf_client_id = cf_client_id
         self._cf_client_secret = cf_client_secret
+        self._series_index = None
+        self._payloads = PayloadTracker()
+        self._webhook_id = webhook_id
+        self._push_debouncer = None
         
     @property
     def name(self):
         """Return the name of the sensor."""
         return self._name
 
+    async def async_added_to_hass(self):
+        """Listen for Sonarr webhooks when a webhook ID is configured."""
+        await super().async_added_to_hass()
+        if not self._webhook_id:
+            return
+        # Bursts such as a season pack import collapse into one refresh
+        self._push_debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=PUSH_DEBOUNCE, immediate=False,
+            function=self.coordinator.async_refresh
+        )
+        receiver = WebhookReceiver(self.hass, self._webhook_id, self.name, self._handle_webhook_event)
+        receiver.async_start()
+        self.async_on_remove(receiver.async_stop)
+        self.async_on_remove(self._push_debouncer.async_cancel)
+        # Webhooks announce changes; keep polling only as a safety net
+        self.coordinator.update_interval = PUSH_SCAN_INTERVAL
+
+    @callback
+    def _handle_webhook_event(self, event_type, data):
+        """Refresh after events that can change the calendar."""
+        if event_type in WEBHOOK_REFRESH_EVENTS:
+            self._push_debouncer.async_schedule_call()
+
     @property
     def unique_id(self):
         """Return a unique ID."""
@@ -36,9 +126,39 @@ class SonarrMediarrSensor(TMDBMediaSensor):
             dt = dt.replace(tzinfo=ZoneInfo('UTC'))
         return dt
 
-    async def async_update(self):
+    async def _get_series_tmdb_id(self, series):
+        """Return the TMDB ID of a series, resolving it only for new series."""
+        if self._series_index is None:
+            self._series_index = SonarrSeriesIndex(self.hass, self._url)
+            await self._series_index.async_load()
+
+        series_id = series['id']
+        tvdb_id = series.get('tvdbId')  # Sonarr uses tvdbId
+        known, tmdb_id = self._series_index.lookup(series_id, tvdb_id)
+        if known:
+            return tmdb_id
+
+        # Sonarr v4 already knows the TMDB ID; otherwise convert from TVDB
+        try:
+            tmdb_id = series.get('tmdbId') or await self._find_tmdb_id(
+                tvdb_id, 'tvdb_id', 'tv', raise_errors=True
+            )
+            if not tmdb_id:
+                # Fallback to search if no TVDB ID or conversion fails
+                tmdb_id = await self._search_tmdb(series['title'], None, 'tv', raise_errors=True)
+        except Exception as err:
+            # Only a definite "no match" is recorded; errors are retried next update
+            _LOGGER.error("Error resolving TMDB ID for %s: %s", series['title'], err)
+            self._tmdb_failed = True
+            return None
+
+        self._series_index.update(series_id, tvdb_id, tmdb_id)
+        return tmdb_id
+
+    async def _async_update_data(self):
         """Update the sensor."""
         try:
+            self._tmdb_failed = False
             headers = {
                 'X-Api-Key': self._sonarr_api_key,
                 "CF-Access-Client-Id": self._cf_client_id,
@@ -51,14 +171,22 @@ class SonarrMediarrSensor(TMDBMediaSensor):
                 'includeSeries': 'true'
             }
 
+            url = f"{self._url}/api/v3/calendar"
+            headers.update(self._payloads.request_headers(url))
+
             async with async_timeout.timeout(10):
                 async with self._session.get(
-                    f"{self._url}/api/v3/calendar",
+                    url,
                     headers=headers,
                     params=params
                 ) as response:
-                    if response.status == 200:
-                        upcoming_episodes = await response.json()
+                    if response.status in (200, 304):
+                        body = await response.read()
+                        if not self._payloads.check(url, response, body):
+                            _LOGGER.debug("Sonarr calendar unchanged, skipping update")
+                            return
+
+                        upcoming_episodes = json.loads(body)
                         card_json = []
                         shows_dict = {}
 
@@ -78,27 +206,22 @@ class SonarrMediarrSensor(TMDBMediaSensor):
                                 _LOGGER.warning("Error parsing date: %s", e)
                                 continue
 
-                            # In sonarr.py, modify the relevant part:
                             series_id = series['id']
-                            tvdb_id = series.get('tvdbId')  # Sonarr uses tvdbId
-
-                            # Try to get TMDB ID using the TVDB external ID
-                            if tvdb_id:
-                                data = await self._fetch_tmdb_data(f"find/{tvdb_id}?external_source=tvdb_id")
-                                if data and data.get('tv_results'):
-                                    tmdb_id = data['tv_results'][0]['id']
-                            else:
-                                # Fallback to search if no TVDB ID or conversion fails
-                                tmdb_id = await self._search_tmdb(
-                                    series['title'],
-                                    None,
-                                    'tv'
-                                )
+
+                            # Keep only the earliest upcoming episode per series
+                            if series_id not in shows_dict or air_date < shows_dict[series_id][2]:
+                                shows_dict[series_id] = (episode, series, air_date)
+
+                        upcoming = sorted(shows_dict.values(), key=lambda x: x[2])
+
+                        # Resolve TMDB IDs per series (not per episode), and only for shown items
+                        for episode, series, air_date in upcoming[:self._max_items]:
+                            tmdb_id = await self._get_series_tmdb_id(series)
 
                             # Get all three image types
                             poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'tv') if tmdb_id else (None, None, None)
 
-                            show_data = {
+                            card_json.append({
                                 'title': f"{series['title']} - {episode.get('seasonNumber', 0):02d}x{episode.get('episodeNumber', 0):02d}",  # Show with episode number
                                 'episode': str(episode.get('title', 'Unknown')),
                                 'release': air_date,
@@ -111,14 +234,7 @@ class SonarrMediarrSensor(TMDBMediaSensor):
                                 'season': str(episode.get('seasonNumber', 0)),
                                 'details': f"{series['title']}\n{episode.get('title', 'Unknown')}\nS{episode.get('seasonNumber', 0):02d}E{episode.get('episodeNumber', 0):02d}",
                                 'flag': 1
-                            }
-
-                            if series_id not in shows_dict or air_date < shows_dict[series_id]['release']:
-                                shows_dict[series_id] = show_data
-
-                        upcoming_shows = list(shows_dict.values())
-                        upcoming_shows.sort(key=lambda x: x['release'])
-                        card_json.extend(upcoming_shows[:self._max_items])
+                            })
 
                         if not card_json:
                             card_json.append({
@@ -130,14 +246,18 @@ class SonarrMediarrSensor(TMDBMediaSensor):
                                 'icon': 'mdi:arrow-down-circle'
                             })
 
-                        self._state = len(upcoming_shows)
+                        self._state = len(upcoming)
                         self._attributes = {'data': card_json}
                         self._available = True
+                        if not self._tmdb_failed:
+                            # Otherwise the calendar is enriched again next poll
+                            self._payloads.store(url, True)
                     else:
                         raise Exception(f"Failed to connect to Sonarr. Status: {response.status}")
 
         except Exception as err:
             _LOGGER.error("Error updating Sonarr sensor: %s", err)
+            self._payloads.clear()
             self._state = 0
             self._attributes = {'data': []}
             self._available = False
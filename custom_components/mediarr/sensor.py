@@ -1,21 +1,66 @@
 # mediarr/sensor.py
+import voluptuous as vol
+from homeassistant.components.sensor import PLATFORM_SCHEMA as SENSOR_PLATFORM_SCHEMA
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .discovery.tmdb import TMDB_ENDPOINTS
+from .common.tmdb_cache import async_setup_tmdb_cache
+from .common.image_cache import async_setup_image_cache
+from .common.image_proxy import async_setup_image_proxy
+from .common.session import UPSTREAM_TMDB, UPSTREAM_TRAKT, async_get_session
 from .common.const import (
     CONF_MAX_ITEMS, 
     CONF_DAYS, 
+    CONF_IMAGE_CACHE_MAX_FILES,
+    CONF_IMAGE_CACHE_MAX_MB,
+    CONF_IMAGE_PROXY,
+    CONF_DIAGNOSTIC_SENSORS,
+    CONF_FETCH_MODE,
     DEFAULT_MAX_ITEMS, 
-    DEFAULT_DAYS
+    DEFAULT_DAYS,
+    DEFAULT_IMAGE_CACHE_MAX_FILES,
+    DEFAULT_IMAGE_CACHE_MAX_MB,
+    PLEX_MODE_HUB,
+    PLEX_MODE_SECTIONS,
+    RADARR_MODE_CALENDAR,
+    RADARR_MODE_LIBRARY
 )
 
+# Options with a fixed set of values are checked; the rest passes through
+PLATFORM_SCHEMA = SENSOR_PLATFORM_SCHEMA.extend({
+    vol.Optional("plex"): vol.Schema({
+        vol.Optional(CONF_FETCH_MODE, default=PLEX_MODE_SECTIONS): vol.In(
+            [PLEX_MODE_HUB, PLEX_MODE_SECTIONS]
+        ),
+    }, extra=vol.ALLOW_EXTRA),
+    vol.Optional("radarr"): vol.Schema({
+        vol.Optional(CONF_FETCH_MODE, default=RADARR_MODE_CALENDAR): vol.In(
+            [RADARR_MODE_CALENDAR, RADARR_MODE_LIBRARY]
+        ),
+    }, extra=vol.ALLOW_EXTRA),
+}, extra=vol.ALLOW_EXTRA)
+
 async def async_setup_platform(hass, config, async_add_entities, discovery_info=None):
     """Set up Mediarr sensors from YAML configuration."""
-    session = async_get_clientsession(hass)
     sensors = []
 
+    # Warm the shared TMDB cache from disk before the first update
+    await async_setup_tmdb_cache(hass)
+
+    # One image cache for every sensor, created before anything can use it
+    # so the configured budget is the one that applies
+    if "jellyfin" in config or config.get(CONF_IMAGE_PROXY, False):
+        async_setup_image_cache(
+            hass,
+            config.get("jellyfin", {}).get(CONF_IMAGE_CACHE_MAX_MB, DEFAULT_IMAGE_CACHE_MAX_MB),
+            config.get("jellyfin", {}).get(CONF_IMAGE_CACHE_MAX_FILES, DEFAULT_IMAGE_CACHE_MAX_FILES)
+        )
+
+    # Serve card images resized instead of at full size
+    if config.get(CONF_IMAGE_PROXY, False):
+        async_setup_image_proxy(hass, async_get_session(hass, UPSTREAM_TMDB))
+
     # Server Sensors
     if "plex" in config:
         from .server.plex import PlexMediarrSensor
@@ -36,33 +81,37 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
     if "sonarr" in config:
         from .manager.sonarr import SonarrMediarrSensor
         sensors.append(SonarrMediarrSensor(
-            session,
+            async_get_session(hass, config["sonarr"]["url"]),
             config["sonarr"]["api_key"],
             config["sonarr"]["url"],
             config["sonarr"].get("tmdb_api_key"),
             config["sonarr"].get("max_items", DEFAULT_MAX_ITEMS),
             config["sonarr"].get("days_to_check", DEFAULT_DAYS),
             config["sonarr"]["cf_client_id"],
-            config["sonarr"]["cf_client_secret"]
+            config["sonarr"]["cf_client_secret"],
+            config["sonarr"].get("webhook_id")
         ))
 
     if "radarr" in config:
         from .manager.radarr import RadarrMediarrSensor
         sensors.append(RadarrMediarrSensor(
-            session,
+            async_get_session(hass, config["radarr"]["url"]),
             config["radarr"]["api_key"],
             config["radarr"]["url"],
             config["radarr"].get("tmdb_api_key"),
             config["radarr"].get("max_items", DEFAULT_MAX_ITEMS),
             config["radarr"]["cf_client_id"],
-            config["radarr"]["cf_client_secret"]
+            config["radarr"]["cf_client_secret"],
+            config["radarr"].get("days_to_check", DEFAULT_DAYS),
+            config["radarr"].get("fetch_mode", RADARR_MODE_CALENDAR),
+            config["radarr"].get("webhook_id")
         ))
 
     # Discovery Sensors
     if "trakt" in config:
         from .discovery.trakt import TraktMediarrSensor
         sensors.append(TraktMediarrSensor(
-            session,
+            async_get_session(hass, UPSTREAM_TRAKT),
             config["trakt"]["client_id"],
             config["trakt"]["client_secret"],
             config["trakt"].get("trending_type", "both"),
@@ -71,18 +120,24 @@ async def async_setup_platform(hass, config, async_add_entities, discovery_info=
         ))
 
     if "tmdb" in config:
-        from .discovery.tmdb import TMDBMediarrSensor
+        from .discovery.tmdb import TMDBDiscoveryFetcher, TMDBMediarrSensor
         tmdb_config = config["tmdb"]
         tmdb_api_key = tmdb_config.get("tmdb_api_key")  # Updated to use tmdb_api_key instead of api_key
-        
-        for endpoint in TMDB_ENDPOINTS.keys():
-            if tmdb_config.get(endpoint, False):  # Only create sensors for enabled endpoints
-                sensors.append(TMDBMediarrSensor(
-                    session,
-                    tmdb_api_key,
-                    tmdb_config.get("max_items", DEFAULT_MAX_ITEMS),
-                    endpoint
-                ))
+
+        # Only create sensors for enabled endpoints; one fetcher serves them all
+        fetcher = TMDBDiscoveryFetcher(
+            async_get_session(hass, UPSTREAM_TMDB),
+            tmdb_api_key,
+            tmdb_config.get("max_items", DEFAULT_MAX_ITEMS),
+            [endpoint for endpoint in TMDB_ENDPOINTS if tmdb_config.get(endpoint, False)]
+        )
+        for endpoint in fetcher.endpoints:
+            sensors.append(TMDBMediarrSensor(fetcher, endpoint))
+
+    if sensors and config.get(CONF_DIAGNOSTIC_SENSORS, False):
+        from .common.metrics_sensor import MediarrMetricsSensor, MediarrUpdateDurationSensor
+        sensors.extend([MediarrUpdateDurationSensor(sensor) for sensor in sensors])
+        sensors.append(MediarrMetricsSensor())
 
     if sensors:
         async_add_entities(sensors, True)
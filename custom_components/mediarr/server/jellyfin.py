@@ -1,26 +1,64 @@
 """Jellyfin integration for Mediarr using TMDB images."""
+import asyncio
+import json
 import logging
-import aiohttp
+import re
+from datetime import timedelta
 import async_timeout
 import voluptuous as vol
-from pathlib import Path
 from homeassistant.const import CONF_TOKEN, CONF_HOST, CONF_PORT
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
-from ..common.const import CONF_MAX_ITEMS, DEFAULT_MAX_ITEMS
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_time_interval
+from ..common.const import (
+    CONF_MAX_ITEMS,
+    CONF_CONCURRENCY,
+    CONF_UPDATE_DEADLINE,
+    CONF_IMAGE_CACHE_MAX_MB,
+    CONF_IMAGE_CACHE_MAX_FILES,
+    CONF_PUSH,
+    DEFAULT_MAX_ITEMS,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_UPDATE_DEADLINE,
+    DEFAULT_IMAGE_CACHE_MAX_MB,
+    DEFAULT_IMAGE_CACHE_MAX_FILES,
+    IMAGE_FANART_WIDTH,
+    IMAGE_POSTER_WIDTH,
+    PUSH_DEBOUNCE,
+    PUSH_SCAN_INTERVAL,
+    SCAN_INTERVAL
+)
+from ..common.concurrency import async_gather_bounded
+from ..common.conditional import PayloadTracker
+from ..common.session import async_get_session
+from ..common.image_cache import get_image_cache, write_atomic
+from ..common.image_proxy import proxy_image_url
 from ..common.tmdb_sensor import TMDBMediaSensor
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from ..common.websocket import WebsocketListener
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_HOST = 'localhost'
 DEFAULT_PORT = 8096
 
+ITEM_FIELDS = "ProviderIds,Overview,PremiereDate,RunTimeTicks,Genres,ParentIndexNumber,IndexNumber,SeriesName,SeriesId,ProductionYear"
+# Processed items kept for incremental updates, as a multiple of max_items
+ENTRIES_PER_ITEM = 3
+# Item types a library change is applied for
+PUSH_ITEM_TYPES = ('Movie', 'Episode')
+
 JELLYFIN_SCHEMA = {
     vol.Required(CONF_TOKEN): cv.string,
     vol.Required('tmdb_api_key'): cv.string,
     vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
     vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
     vol.Optional(CONF_MAX_ITEMS, default=DEFAULT_MAX_ITEMS): cv.positive_int,
+    vol.Optional(CONF_CONCURRENCY, default=DEFAULT_CONCURRENCY): cv.positive_int,
+    vol.Optional(CONF_UPDATE_DEADLINE, default=DEFAULT_UPDATE_DEADLINE): cv.positive_int,
+    vol.Optional(CONF_IMAGE_CACHE_MAX_MB, default=DEFAULT_IMAGE_CACHE_MAX_MB): cv.positive_int,
+    vol.Optional(CONF_IMAGE_CACHE_MAX_FILES, default=DEFAULT_IMAGE_CACHE_MAX_FILES): cv.positive_int,
+    vol.Optional(CONF_PUSH, default=False): cv.boolean,
 }
 
 class JellyfinMediarrSensor(TMDBMediaSensor):
@@ -32,11 +70,27 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
         self._base_url = f"http://{config[CONF_HOST]}:{config[CONF_PORT]}"
         self._jellyfin_token = config[CONF_TOKEN]
         self._max_items = config[CONF_MAX_ITEMS]
+        self._concurrency = config.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY)
+        self._update_deadline = config.get(CONF_UPDATE_DEADLINE, DEFAULT_UPDATE_DEADLINE)
         self._name = "Jellyfin Mediarr"
         self._user_id = user_id
         self._session = session
         self._state = 0
         self._attributes = {'data': []}
+        self._payloads = PayloadTracker()
+        self._payload_changed = True
+        # Cache file names referenced by the current update
+        self._referenced_images = set()
+        # Processed card entries keyed by Jellyfin item ID
+        self._entries = {}
+        self._push = config.get(CONF_PUSH, False)
+        self._listener = None
+        self._push_debouncer = None
+        self._keepalive_unsub = None
+        # Library changes waiting to be applied, and those the next update applies
+        self._pending_added = set()
+        self._pending_removed = set()
+        self._push_changes = None
 
     @property
     def name(self):
@@ -48,84 +102,225 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
         """Return a unique ID for the sensor."""
         return "jellyfin_mediarr"
 
-    async def _download_and_cache_image(self, url, item_id, image_type):
-        """Download and cache an image from Jellyfin."""
-        cache_dir = Path(self.hass.config.path("www/mediarr/cache"))
-        cache_dir.mkdir(parents=True, exist_ok=True)
-        
-        file_name = f"{item_id}_{image_type}.jpg"
-        cached_path = cache_dir / file_name
+    @property
+    def coordinator_key(self):
+        """Return the key of the server and user this sensor reads from and how."""
+        return f"jellyfin_{self._base_url}_{self._user_id}_{self._max_items}"
+
+    @property
+    def _image_cache(self):
+        """Return the shared on-disk image cache."""
+        return get_image_cache(self.hass)
+
+    async def async_added_to_hass(self):
+        """Subscribe to Jellyfin library changes when push updates are enabled."""
+        await super().async_added_to_hass()
+        if not self._push:
+            return
+        self._push_debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=PUSH_DEBOUNCE, immediate=False,
+            function=self._async_push_refresh
+        )
+        self._listener = WebsocketListener(
+            self.hass,
+            self._session,
+            f"{self._base_url}/socket",
+            "Jellyfin",
+            self._handle_message,
+            on_connect=self._handle_push_connected,
+            on_disconnect=self._handle_push_disconnected,
+            params={"api_key": self._jellyfin_token, "deviceId": f"mediarr-{self._user_id}"}
+        )
+        self._listener.async_start()
+        self.async_on_remove(self._listener.async_stop)
+        self.async_on_remove(self._push_debouncer.async_cancel)
+        self.async_on_remove(self._stop_keepalive)
+
+    @callback
+    def _handle_push_connected(self):
+        """Stretch polling to a safety net while library changes arrive."""
+        self.coordinator.update_interval = PUSH_SCAN_INTERVAL
+        if self._listener.connects > 1:
+            # Catch up on anything added while disconnected
+            self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def _handle_push_disconnected(self):
+        """Fall back to regular polling."""
+        self._stop_keepalive()
+        self.coordinator.update_interval = SCAN_INTERVAL
+        # The setter does not reschedule the pending poll, which can be hours
+        # away; refreshing now catches up and re-arms it at the new interval
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def _stop_keepalive(self):
+        if self._keepalive_unsub is not None:
+            self._keepalive_unsub()
+            self._keepalive_unsub = None
+
+    async def _async_send_keepalive(self, now=None):
+        await self._listener.async_send_json({"MessageType": "KeepAlive"})
+
+    @callback
+    def _handle_message(self, data):
+        """Handle a message from the Jellyfin socket."""
+        message_type = data.get('MessageType')
+        if message_type == 'ForceKeepAlive':
+            # The server drops sessions silent for longer than the given seconds
+            self._stop_keepalive()
+            interval = timedelta(seconds=max(int(data.get('Data') or 60) / 2, 5))
+            self._keepalive_unsub = async_track_time_interval(
+                self.hass, self._async_send_keepalive, interval
+            )
+            self.hass.async_create_task(self._async_send_keepalive())
+        elif message_type == 'LibraryChanged':
+            changes = data.get('Data') or {}
+            added = set(changes.get('ItemsAdded') or [])
+            removed = set(changes.get('ItemsRemoved') or [])
+            self._pending_added = (self._pending_added - removed) | added
+            self._pending_removed = (self._pending_removed - added) | removed
+            if self._pending_added or self._pending_removed:
+                self._push_debouncer.async_schedule_call()
+
+    async def _async_push_refresh(self):
+        """Apply the library changes collected since the last refresh."""
+        self._push_changes = (self._pending_added, self._pending_removed)
+        self._pending_added = set()
+        self._pending_removed = set()
+        await self.coordinator.async_refresh()
+
+    async def _download_and_cache_image(self, item_id, image_type, tag):
+        """Download and cache a Jellyfin image, keyed by its image tag.
+
+        Files are named after the item, image type and tag, so an unchanged
+        image is never downloaded twice and the returned URL changes whenever
+        the image does.
+        """
+        if not item_id or not tag:
+            return None
+
+        jellyfin_type = "Primary" if image_type == "poster" else "Backdrop"
+        file_name = f"{item_id}_{image_type}_{re.sub(r'[^0-9A-Za-z]', '', str(tag))}.jpg"
+        image_cache = self._image_cache
+        cached_path = image_cache.path / file_name
+        self._referenced_images.add(file_name)
+        image_cache.touch(file_name)
 
         try:
+            if await self.hass.async_add_executor_job(cached_path.exists):
+                return image_cache.url_for(file_name)
+
             headers = {
                 "Authorization": f'MediaBrowser Token="{self._jellyfin_token}"',
                 "Accept": "image/jpeg"
             }
+            url = f"{self._base_url}/Items/{item_id}/Images/{jellyfin_type}"
             
             async with async_timeout.timeout(10):
-                async with self._session.get(url, headers=headers) as response:
+                async with self._session.get(url, headers=headers, params={"tag": tag}) as response:
                     if response.status == 200:
                         content = await response.read()
-                        with open(cached_path, 'wb') as f:
-                            f.write(content)
-                        return f"/local/mediarr/cache/{file_name}"
+                        await self.hass.async_add_executor_job(write_atomic, cached_path, content)
+                        return image_cache.url_for(file_name)
         except Exception as err:
             _LOGGER.error("Error caching image: %s", err)
         return None
 
-    def _clean_unused_images(self, current_ids):
-        """Clean up cached images that aren't in the current item list."""
-        try:
-            cache_dir = Path(self.hass.config.path("www/mediarr/cache"))
-            if not cache_dir.exists():
-                return
-
-            for image_file in cache_dir.glob("*.jpg"):
-                item_id = image_file.stem.split('_')[0]
-                if item_id not in current_ids:
-                    image_file.unlink(missing_ok=True)
-        except Exception as err:
-            _LOGGER.error("Error cleaning cached images: %s", err)
+    async def _get_jellyfin_images(self, item):
+        """Get and cache images from Jellyfin, falling back to the series images."""
+        poster = (item.get('Id'), item.get('ImageTags', {}).get('Primary'))
+        if not poster[1]:
+            poster = (item.get('SeriesId'), item.get('SeriesPrimaryImageTag'))
 
-    async def _get_jellyfin_images(self, item_id):
-        """Get and cache images from Jellyfin."""
-        base_img_url = f"{self._base_url}/Items/{item_id}/Images"
-        poster_url = f"{base_img_url}/Primary"
-        backdrop_url = f"{base_img_url}/Backdrop"
+        backdrop_tags = item.get('BackdropImageTags') or []
+        backdrop = (item.get('Id'), backdrop_tags[0] if backdrop_tags else None)
+        if not backdrop[1]:
+            parent_tags = item.get('ParentBackdropImageTags') or []
+            backdrop = (item.get('ParentBackdropItemId'), parent_tags[0] if parent_tags else None)
 
         try:
-            cached_poster = await self._download_and_cache_image(poster_url, item_id, "poster")
-            cached_backdrop = await self._download_and_cache_image(backdrop_url, item_id, "backdrop")
-            
+            cached_poster, cached_backdrop = await asyncio.gather(
+                self._download_and_cache_image(poster[0], "poster", poster[1]),
+                self._download_and_cache_image(backdrop[0], "backdrop", backdrop[1])
+            )
+            cached_poster = proxy_image_url(self.hass, cached_poster, IMAGE_POSTER_WIDTH)
+            cached_backdrop = proxy_image_url(self.hass, cached_backdrop, IMAGE_FANART_WIDTH)
             return cached_poster, cached_backdrop, cached_backdrop
         except Exception as err:
             _LOGGER.error("Error getting Jellyfin images: %s", err)
         return None, None, None
 
-    async def _get_libraries(self):
-        """Fetch movie and TV show libraries."""
-        url = f"{self._base_url}/Users/{self._user_id}/Views"
+    async def _fetch_json(self, key, url, params=None, parse=None):
+        """Fetch JSON from Jellyfin, reusing the previous result when unchanged.
+
+        parse turns the decoded JSON into the value that is returned and
+        remembered for the payload.
+        """
         headers = {
             "Authorization": f'MediaBrowser Token="{self._jellyfin_token}"',
             "Accept": "application/json"
         }
+        headers.update(self._payloads.request_headers(key))
 
-        libraries = {'movies': [], 'tvshows': []}
-        
         try:
             async with async_timeout.timeout(10):
-                async with self._session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        for lib in data['Items']:
-                            if lib['CollectionType'] == 'movies':
-                                libraries['movies'].append(lib['Id'])
-                            elif lib['CollectionType'] == 'tvshows':
-                                libraries['tvshows'].append(lib['Id'])
-                        return libraries
+                async with self._session.get(url, params=params, headers=headers) as response:
+                    if response.status not in (200, 304):
+                        raise Exception(f"Jellyfin API error: {response.status}")
+                    body = await response.read()
+                    if not self._payloads.check(key, response, body):
+                        return self._payloads.cached(key)
+                    self._payload_changed = True
+                    data = json.loads(body)
+                    result = parse(data) if parse else data
+                    self._payloads.store(key, result)
+                    return result
+        except Exception:
+            self._payloads.forget(key)
+            self._payload_changed = True
+            raise
+
+    @staticmethod
+    def _parse_libraries(data):
+        """Split library views into movie and TV show library IDs."""
+        libraries = {'movies': [], 'tvshows': []}
+        for lib in data['Items']:
+            if lib.get('CollectionType') == 'movies':
+                libraries['movies'].append(lib['Id'])
+            elif lib.get('CollectionType') == 'tvshows':
+                libraries['tvshows'].append(lib['Id'])
+        return libraries
+
+    async def _get_libraries(self):
+        """Fetch movie and TV show libraries."""
+        url = f"{self._base_url}/Users/{self._user_id}/Views"
+
+        try:
+            return await self._fetch_json(url, url, parse=self._parse_libraries)
         except Exception as err:
             _LOGGER.error("Error fetching libraries: %s", err)
-        return libraries
+        return {'movies': [], 'tvshows': []}
+
+    async def _fetch_items(self, item_ids):
+        """Fetch specific items by ID."""
+        url = f"{self._base_url}/Users/{self._user_id}/Items"
+        params = {
+            "Ids": ",".join(sorted(item_ids)),
+            "Fields": ITEM_FIELDS,
+            "EnableImages": "true",
+            "ImageTypeLimit": 1
+        }
+        headers = {
+            "Authorization": f'MediaBrowser Token="{self._jellyfin_token}"',
+            "Accept": "application/json"
+        }
+        async with async_timeout.timeout(10):
+            async with self._session.get(url, params=params, headers=headers) as response:
+                if response.status != 200:
+                    raise Exception(f"Jellyfin API error: {response.status}")
+                data = await response.json()
+        return data.get('Items', [])
 
     async def _fetch_recently_added(self, library_id):
         """Fetch recently added items from a library."""
@@ -133,21 +328,13 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
         params = {
             "ParentId": library_id,
             "Limit": self._max_items,
-            "Fields": "ProviderIds,Overview,PremiereDate,RunTimeTicks,Genres,ParentIndexNumber,IndexNumber,SeriesName,SeriesId,ProductionYear",
+            "Fields": ITEM_FIELDS,
             "EnableImages": "true",
             "ImageTypeLimit": 1
         }
-        headers = {
-            "Authorization": f'MediaBrowser Token="{self._jellyfin_token}"',
-            "Accept": "application/json"
-        }
 
         try:
-            async with async_timeout.timeout(10):
-                async with self._session.get(url, params=params, headers=headers) as response:
-                    if response.status == 200:
-                        return await response.json()
-                    return []
+            return await self._fetch_json(f"{url}?ParentId={library_id}", url, params)
         except Exception as err:
             _LOGGER.error("Error fetching recently added items: %s", err)
             return []
@@ -156,7 +343,6 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
         """Process a single item from Jellyfin."""
         try:
             is_episode = item.get('Type') == 'Episode'
-            item_id = item.get('Id')
             
             if is_episode:
                 # Get TMDB ID for the series
@@ -172,7 +358,7 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
                 if tmdb_id:
                     poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'tv')
                 if not tmdb_id or not (poster_url or backdrop_url or main_backdrop_url):
-                    poster_url, backdrop_url, main_backdrop_url = await self._get_jellyfin_images(item_id)
+                    poster_url, backdrop_url, main_backdrop_url = await self._get_jellyfin_images(item)
                 
                 return {
                     'title': str(item.get('SeriesName', '')),
@@ -203,7 +389,7 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
                 if tmdb_id:
                     poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'movie')
                 if not tmdb_id or not (poster_url or backdrop_url or main_backdrop_url):
-                    poster_url, backdrop_url, main_backdrop_url = await self._get_jellyfin_images(item_id)
+                    poster_url, backdrop_url, main_backdrop_url = await self._get_jellyfin_images(item)
                 
                 return {
                     'title': str(item.get('Name', 'Unknown')),
@@ -222,52 +408,105 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
             _LOGGER.error("Error processing item: %s", err)
             return None
 
-    async def async_update(self):
+    def _publish(self):
+        """Set the state from the most recent processed entries."""
+        ranked = sorted(
+            self._entries.items(), key=lambda x: x[1].get('release', ''), reverse=True
+        )
+        # Keep a few more than shown so removals can be backfilled
+        self._entries = dict(ranked[:self._max_items * ENTRIES_PER_ITEM])
+        recently_added = [entry for _, entry in ranked[:self._max_items]]
+
+        if recently_added:
+            self._state = len(recently_added)
+            self._attributes = {'data': recently_added}
+        else:
+            self._state = 0
+            self._attributes = {'data': [{
+                'title_default': '$title',
+                'line1_default': '$episode',
+                'line2_default': '$release',
+                'line3_default': '$number - $rating - $runtime',
+                'line4_default': '$genres',
+                'icon': 'mdi:eye-off'
+            }]}
+        self._available = True
+
+    async def _async_apply_changes(self, added, removed):
+        """Apply added and removed items without refetching the libraries."""
+        changed = False
+        self._tmdb_failed = False
+        for item_id in removed:
+            changed = self._entries.pop(item_id, None) is not None or changed
+
+        items = await self._fetch_items(added) if added else []
+        items = [item for item in items if item.get('Type') in PUSH_ITEM_TYPES]
+        if items:
+            processed = await async_gather_bounded(
+                list(enumerate(items)), self._process_ranked, self._concurrency, self._update_deadline
+            )
+            for item, entry in zip(items, processed):
+                if entry:
+                    self._entries[item['Id']] = entry
+                    changed = True
+            if self._tmdb_failed:
+                # Enrich everything again on the next full refresh
+                self._payloads.clear()
+
+        _LOGGER.debug("Applied Jellyfin library changes: %d added, %d removed", len(items), len(removed))
+        if changed:
+            self._publish()
+
+    async def _async_update_data(self):
         """Update sensor data."""
+        changes, self._push_changes = self._push_changes, None
+        if changes is not None and self._entries:
+            try:
+                await self._async_apply_changes(*changes)
+                return
+            except Exception as err:
+                _LOGGER.error("Error applying Jellyfin library changes, refreshing fully: %s", err)
+
         try:
-            recently_added = []
-            current_item_ids = set()
+            self._payload_changed = False
+            self._tmdb_failed = False
             libraries = await self._get_libraries()
             
             # Get all libraries (both movies and TV)
             all_libraries = libraries['movies'] + libraries['tvshows']
             
-            # Fetch recent items from all libraries
-            for library_id in all_libraries:
-                items = await self._fetch_recently_added(library_id)
-                for item in items:
-                    processed = await self._process_item(item)
-                    if processed:
-                        item_id = item.get('Id')
-                        if item_id:
-                            current_item_ids.add(item_id)
-                        recently_added.append(processed)
-
-            # Clean up unused cached images
-            self._clean_unused_images(current_item_ids)
-
-            # Sort and update state
-            recently_added.sort(key=lambda x: x.get('release', ''), reverse=True)
-            recently_added = recently_added[:self._max_items]
-
-            if recently_added:
-                self._state = len(recently_added)
-                self._attributes = {'data': recently_added}
-            else:
-                self._state = 0
-                self._attributes = {'data': [{
-                    'title_default': '$title',
-                    'line1_default': '$episode',
-                    'line2_default': '$release',
-                    'line3_default': '$number - $rating - $runtime',
-                    'line4_default': '$genres',
-                    'icon': 'mdi:eye-off'
-                }]}
-            
-            self._available = True
+            # Fetch recent items from all libraries at once
+            library_items = await asyncio.gather(
+                *(self._fetch_recently_added(library_id) for library_id in all_libraries)
+            )
+            items = [item for library_result in library_items for item in library_result]
+
+            # Keep images on the card fresh for the cache collector
+            for file_name in self._referenced_images:
+                self._image_cache.touch(file_name)
+
+            if not self._payload_changed:
+                _LOGGER.debug("Jellyfin recently added unchanged, skipping update")
+                return
+
+            # Enrich items in a bounded pool; stragglers past the deadline are dropped
+            self._referenced_images = set()
+            processed = await async_gather_bounded(
+                list(enumerate(items)), self._process_ranked, self._concurrency, self._update_deadline
+            )
+            if None in processed or self._tmdb_failed:
+                # Retry skipped or unenriched items next poll even if the
+                # payload is unchanged
+                self._payloads.clear()
+
+            self._entries = {
+                item['Id']: entry for item, entry in zip(items, processed) if entry
+            }
+            self._publish()
 
         except Exception as err:
             _LOGGER.error("Error updating Jellyfin sensor: %s", err)
+            self._payloads.clear()
             self._state = 0
             self._attributes = {'data': []}
             self._available = False
@@ -285,18 +524,18 @@ class JellyfinMediarrSensor(TMDBMediaSensor):
             }
             
             url = f"{base_url}/Users"
-            async with aiohttp.ClientSession() as session:
-                async with async_timeout.timeout(10):
-                    async with session.get(url, headers=headers) as response:
-                        if response.status != 200:
-                            raise Exception(f"Error fetching user info: {response.status}")
-                        users = await response.json()
-                        if not users:
-                            raise Exception("No users found")
-                        user = next((u for u in users if u.get('Policy', {}).get('IsAdministrator')), users[0])
-                        user_id = user['Id']
-
-            return [cls(async_get_clientsession(hass), config, user_id)]
+            session = async_get_session(hass, base_url)
+            async with async_timeout.timeout(10):
+                async with session.get(url, headers=headers) as response:
+                    if response.status != 200:
+                        raise Exception(f"Error fetching user info: {response.status}")
+                    users = await response.json()
+                    if not users:
+                        raise Exception("No users found")
+                    user = next((u for u in users if u.get('Policy', {}).get('IsAdministrator')), users[0])
+                    user_id = user['Id']
+
+            return [cls(session, config, user_id)]
 
         except Exception as error:
             _LOGGER.error("Error initializing Jellyfin sensors: %s", error)
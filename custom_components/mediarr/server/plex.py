@@ -1,26 +1,63 @@
 """Plex integration for Mediarr using TMDB images."""
+import asyncio
+import hashlib
 import logging
 import xml.etree.ElementTree as ET
-import aiohttp
+from datetime import datetime
 import async_timeout
 import voluptuous as vol
 from homeassistant.const import CONF_TOKEN, CONF_HOST, CONF_PORT
+from homeassistant.core import callback
 import homeassistant.helpers.config_validation as cv
-from ..common.const import CONF_MAX_ITEMS, DEFAULT_MAX_ITEMS
+from homeassistant.helpers.debounce import Debouncer
+from ..common.const import (
+    CONF_MAX_ITEMS,
+    CONF_CONCURRENCY,
+    CONF_FETCH_MODE,
+    CONF_PUSH,
+    DEFAULT_MAX_ITEMS,
+    DEFAULT_CONCURRENCY,
+    PLEX_MODE_HUB,
+    PLEX_MODE_SECTIONS,
+    PLEX_SECTIONS_REFRESH_INTERVAL,
+    PUSH_DEBOUNCE,
+    PUSH_SCAN_INTERVAL,
+    SCAN_INTERVAL
+)
+from ..common.concurrency import async_gather_bounded
+from ..common.conditional import PayloadTracker
+from ..common.session import async_get_session
 from ..common.tmdb_sensor import TMDBMediaSensor
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from ..common.websocket import WebsocketListener
 
 _LOGGER = logging.getLogger(__name__)
 
 DEFAULT_HOST = 'localhost'
 DEFAULT_PORT = 32400
 
+XML_CHUNK_SIZE = 64 * 1024
+# Recently added candidates kept per section, as a multiple of max_items
+CANDIDATES_PER_ITEM = 3
+# Upper bound on pages requested from the global recently added hub
+HUB_MAX_PAGES = 5
+# Only movie and TV libraries feed the sensor
+SECTION_TYPES = ('movie', 'show')
+
+NOTIFICATIONS_PATH = "/:/websockets/notifications"
+# Timeline entries for movies, shows and episodes
+TIMELINE_TYPES = (1, 2, 4)
+# Timeline states of items that finished processing or were deleted
+TIMELINE_STATES = (5, 9)
+
 PLEX_SCHEMA = {
     vol.Required(CONF_TOKEN): cv.string,
     vol.Required('tmdb_api_key'): cv.string,
     vol.Optional(CONF_HOST, default=DEFAULT_HOST): cv.string,
     vol.Optional(CONF_PORT, default=DEFAULT_PORT): cv.port,
     vol.Optional(CONF_MAX_ITEMS, default=DEFAULT_MAX_ITEMS): cv.positive_int,
+    vol.Optional(CONF_CONCURRENCY, default=DEFAULT_CONCURRENCY): cv.positive_int,
+    vol.Optional(CONF_FETCH_MODE, default=PLEX_MODE_SECTIONS): vol.In([PLEX_MODE_HUB, PLEX_MODE_SECTIONS]),
+    vol.Optional(CONF_PUSH, default=False): cv.boolean,
 }
 
 class PlexMediarrSensor(TMDBMediaSensor):
@@ -32,9 +69,23 @@ class PlexMediarrSensor(TMDBMediaSensor):
         self._base_url = f"{config[CONF_HOST]}:{config[CONF_PORT]}"
         self._token = config[CONF_TOKEN]
         self._max_items = config[CONF_MAX_ITEMS]
+        self._concurrency = config.get(CONF_CONCURRENCY, DEFAULT_CONCURRENCY)
+        self._fetch_mode = config.get(CONF_FETCH_MODE, PLEX_MODE_SECTIONS)
         self._name = "Plex Mediarr"
+        # Movie and show section keys mapped to their section type
         self._sections = sections
+        self._sections_updated = datetime.now()
         self._session = session
+        self._payloads = PayloadTracker()
+        self._payload_changed = True
+        self._push = config.get(CONF_PUSH, False)
+        self._listener = None
+        self._push_debouncer = None
+        # Sections announced as changed, and those a push refresh is limited to
+        self._dirty_sections = set()
+        self._push_targets = None
+        # Last recently added videos of each section, in sections mode
+        self._section_items = {}
 
     @property
     def name(self):
@@ -46,21 +97,186 @@ class PlexMediarrSensor(TMDBMediaSensor):
         """Return a unique ID for the sensor."""
         return "plex_mediarr"
 
-    async def _fetch_recently_added(self, section_id):
-        """Fetch recently added items from a Plex section."""
-        url = f"{self._base_url}/library/sections/{section_id}/recentlyAdded"
+    @property
+    def coordinator_key(self):
+        """Return the key of the server this sensor reads from and how."""
+        return f"plex_{self._base_url}_{self._fetch_mode}_{self._max_items}"
+
+    async def async_added_to_hass(self):
+        """Subscribe to Plex notifications when push updates are enabled."""
+        await super().async_added_to_hass()
+        if not self._push:
+            return
+        self._push_debouncer = Debouncer(
+            self.hass, _LOGGER, cooldown=PUSH_DEBOUNCE, immediate=False,
+            function=self._async_push_refresh
+        )
+        self._listener = WebsocketListener(
+            self.hass,
+            self._session,
+            f"{self._base_url}{NOTIFICATIONS_PATH}",
+            "Plex",
+            self._handle_notification,
+            on_connect=self._handle_push_connected,
+            on_disconnect=self._handle_push_disconnected,
+            headers={"X-Plex-Token": self._token}
+        )
+        self._listener.async_start()
+        self.async_on_remove(self._listener.async_stop)
+        self.async_on_remove(self._push_debouncer.async_cancel)
+
+    @callback
+    def _handle_push_connected(self):
+        """Stretch polling to a safety net while notifications arrive."""
+        self.coordinator.update_interval = PUSH_SCAN_INTERVAL
+        if self._listener.connects > 1:
+            # Catch up on anything added while disconnected
+            self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def _handle_push_disconnected(self):
+        """Fall back to regular polling."""
+        self.coordinator.update_interval = SCAN_INTERVAL
+        # The setter does not reschedule the pending poll, which can be hours
+        # away; refreshing now catches up and re-arms it at the new interval
+        self.hass.async_create_task(self.coordinator.async_request_refresh())
+
+    @callback
+    def _handle_notification(self, data):
+        """Schedule a refresh for timeline events of movie and show sections."""
+        container = data.get('NotificationContainer') or {}
+        if container.get('type') != 'timeline':
+            return
+        for entry in container.get('TimelineEntry') or []:
+            section_id = str(entry.get('sectionID', ''))
+            if (
+                section_id in self._sections
+                and entry.get('type') in TIMELINE_TYPES
+                and entry.get('state') in TIMELINE_STATES
+            ):
+                self._dirty_sections.add(section_id)
+        if self._dirty_sections:
+            self._push_debouncer.async_schedule_call()
+
+    async def _async_push_refresh(self):
+        """Refresh only the sections that announced changes."""
+        self._push_targets = self._dirty_sections
+        self._dirty_sections = set()
+        await self.coordinator.async_refresh()
+
+    @staticmethod
+    def _video_record(element):
+        """Return a compact record of a <Video> element."""
+        record = dict(element.attrib)
+        record['genres'] = [str(genre.get('tag', '')) for genre in element.iter('Genre')]
+        return record
+
+    @staticmethod
+    def _season_record(element):
+        """Return an episode shaped record of a season <Directory> element.
+
+        The global hub groups episodes added to one season under the season,
+        which carries the show's metadata as its parent. The entry is dated
+        by when it was added, as seasons have no air date.
+        """
+        season = element.attrib
+        added_at = season.get('addedAt')
+        return {
+            'type': 'season',
+            'librarySectionID': season.get('librarySectionID'),
+            'grandparentTitle': season.get('parentTitle', ''),
+            'grandparentGuid': season.get('parentGuid', ''),
+            'title': season.get('title', ''),
+            'parentIndex': season.get('index', ''),
+            'originallyAvailableAt': (
+                datetime.fromtimestamp(int(added_at)).strftime('%Y-%m-%d') if added_at else 'Unknown'
+            ),
+            'genres': [str(genre.get('tag', '')) for genre in element.iter('Genre')],
+        }
+
+    async def _parse_videos(self, chunks, digest, limit=None):
+        """Incrementally parse <Video> records from chunks of an XML response.
+
+        Season <Directory> entries are parsed into records as well. Each
+        chunk is added to digest as it arrives. Reading stops once limit
+        records are parsed, so the digest covers the bytes those came from.
+        Returns the records along with the attributes of the MediaContainer.
+        """
+        parser = ET.XMLPullParser(events=("start", "end"))
+        parents = []
+        videos = []
+        container = {}
+
+        async for chunk in chunks:
+            digest.update(chunk)
+            parser.feed(chunk)
+            for event, element in parser.read_events():
+                if event == "start":
+                    if not parents:
+                        container = dict(element.attrib)
+                    parents.append(element)
+                    continue
+
+                parents.pop()
+                if element.tag == "Video":
+                    videos.append(self._video_record(element))
+                elif element.tag == "Directory" and element.get('type') == 'season' and len(parents) == 1:
+                    videos.append(self._season_record(element))
+                else:
+                    continue
+
+                # Detach processed videos so the tree never holds more than one
+                if parents:
+                    parents[-1].remove(element)
+                element.clear()
+
+                if limit and len(videos) >= limit:
+                    return videos, container
+
+        parser.close()
+        return videos, container
+
+    async def _fetch_recently_added(self, section_id=None, start=0, size=None, limit=None):
+        """Fetch a page of recently added items from a Plex section or the global hub.
+
+        Unchanged payloads are not parsed again; their previous result is
+        returned instead.
+        """
+        if section_id is None:
+            url = f"{self._base_url}/library/recentlyAdded"
+        else:
+            url = f"{self._base_url}/library/sections/{section_id}/recentlyAdded"
         headers = {"X-Plex-Token": self._token}
+        if size:
+            headers["X-Plex-Container-Start"] = str(start)
+            headers["X-Plex-Container-Size"] = str(size)
+        key = f"{url}:{start}:{size}"
+        headers.update(self._payloads.request_headers(key))
         try:
             async with async_timeout.timeout(10):
                 async with self._session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        xml_content = await response.text()
-                        return ET.fromstring(xml_content)
+                    if response.status in (200, 304):
+                        # Parsing is cheap next to TMDB enrichment, so the body
+                        # is hashed while it streams through the parser and
+                        # the result dropped if the payload turns out unchanged
+                        digest = hashlib.sha256()
+                        result = ([], {})
+                        if response.status == 200:
+                            result = await self._parse_videos(
+                                response.content.iter_chunked(XML_CHUNK_SIZE), digest, limit
+                            )
+                        if not self._payloads.record(key, response, digest.hexdigest()):
+                            return self._payloads.cached(key)
+                        self._payload_changed = True
+                        self._payloads.store(key, result)
+                        return result
                     else:
                         raise Exception(f"Failed to fetch recently added: {response.status}")
         except Exception as err:
             _LOGGER.error("Error fetching recently added: %s", err)
-            return None
+            self._payloads.forget(key)
+            self._payload_changed = True
+            return None, {}
 
     async def _get_metadata(self, rating_key):
         """Fetch detailed metadata for an item."""
@@ -80,7 +296,7 @@ class PlexMediarrSensor(TMDBMediaSensor):
     async def _process_item(self, item):
         """Process a single Plex item and get TMDB images."""
         try:
-            is_episode = item.get('type') == 'episode'
+            is_episode = item.get('type') in ('episode', 'season')
             
             if is_episode:
                 show_title = item.get('grandparentTitle', '')
@@ -104,7 +320,12 @@ class PlexMediarrSensor(TMDBMediaSensor):
                 # Get different images for the show
                 poster_url, backdrop_url, main_backdrop_url = await self._get_tmdb_images(tmdb_id, 'tv') if tmdb_id else (None, None, None)
 
-                number = f"S{int(season_number):02d}E{int(episode_number):02d}" if season_number and episode_number else str(episode_number)
+                if season_number and episode_number:
+                    number = f"S{int(season_number):02d}E{int(episode_number):02d}"
+                elif season_number and item.get('type') == 'season':
+                    number = f"S{int(season_number):02d}"
+                else:
+                    number = str(episode_number)
                 air_date = self._format_date(item.get('originallyAvailableAt', 'Unknown'))
 
                 return {
@@ -113,7 +334,7 @@ class PlexMediarrSensor(TMDBMediaSensor):
                     'release': air_date,
                     'number': number,
                     'runtime': str(int(item.get('duration', 0)) // 60000),
-                    'genres': ', '.join(str(genre.get('tag', '')) for genre in item.findall('.//Genre')),
+                    'genres': ', '.join(item.get('genres', [])),
                     'poster': str(poster_url or ""),  # Thumbnail in list
                     'fanart': str(main_backdrop_url or backdrop_url or ""),  # Main display image
                     'banner': str(backdrop_url or ""),  # Additional image if needed
@@ -144,7 +365,7 @@ class PlexMediarrSensor(TMDBMediaSensor):
                     'release': release_date,
                     'number': str(item.get('year', '')),
                     'runtime': str(int(item.get('duration', 0)) // 60000),
-                    'genres': ', '.join(str(genre.get('tag', '')) for genre in item.findall('.//Genre')),
+                    'genres': ', '.join(item.get('genres', [])),
                     'poster': str(poster_url or ""),  # Thumbnail in list
                     'fanart': str(main_backdrop_url or backdrop_url or ""),  # Main display image
                     'banner': str(backdrop_url or ""),  # Additional image if needed
@@ -156,23 +377,112 @@ class PlexMediarrSensor(TMDBMediaSensor):
             _LOGGER.error("Error processing Plex item: %s", err)
             return None
 
-    async def async_update(self):
+    async def _fetch_section_items(self, section_id):
+        """Fetch the recently added videos of one section."""
+        wanted = self._max_items * CANDIDATES_PER_ITEM
+        try:
+            videos, _ = await self._fetch_recently_added(section_id, 0, wanted, wanted)
+            if videos is not None:
+                return videos
+        except Exception as section_err:
+            _LOGGER.error("Error updating section %s: %s", section_id, section_err)
+        return []
+
+    async def _fetch_hub_items(self):
+        """Fetch recently added movie and show videos from the global hub, page by page."""
+        wanted = self._max_items * CANDIDATES_PER_ITEM
+        videos = []
+        start = 0
+
+        for _ in range(HUB_MAX_PAGES):
+            page, container = await self._fetch_recently_added(None, start, wanted)
+            if page is None:
+                break
+            videos.extend(
+                video for video in page
+                if video.get('librarySectionID', container.get('librarySectionID')) in self._sections
+            )
+            returned = int(container.get('size', len(page)))
+            start += returned
+            total = int(container.get('totalSize', start))
+            if len(videos) >= wanted or returned < wanted or start >= total:
+                break
+
+        return videos[:wanted]
+
+    async def _async_refresh_sections(self):
+        """Re-read the section list once it is older than the refresh interval."""
+        if datetime.now() - self._sections_updated < PLEX_SECTIONS_REFRESH_INTERVAL:
+            return
+        try:
+            sections = await self._fetch_sections(self._session, self._base_url, self._token)
+            if sections != self._sections:
+                self._sections = sections
+                self._payload_changed = True
+        except Exception as err:
+            _LOGGER.error("Error refreshing Plex sections: %s", err)
+        # Back off for a full interval on failure too, keeping the old list
+        self._sections_updated = datetime.now()
+
+    @staticmethod
+    async def _fetch_sections(session, base_url, token):
+        """Return movie and show section keys mapped to their type."""
+        url = f"{base_url}/library/sections"
+        headers = {"X-Plex-Token": token, "Accept": "application/xml"}
+
+        async with async_timeout.timeout(10):
+            async with session.get(url, headers=headers) as response:
+                if response.status != 200:
+                    raise Exception(f"Error fetching library sections: {response.status}")
+                xml_content = await response.text()
+
+        root = ET.fromstring(xml_content)
+        return {
+            directory.get("key"): directory.get("type")
+            for directory in root.findall(".//Directory")
+            if directory.get("key") and directory.get("type") in SECTION_TYPES
+        }
+
+    async def _async_update_data(self):
         """Update sensor data."""
         try:
-            recently_added = []
             card_json = []
+            targets, self._push_targets = self._push_targets, None
+
+            self._payload_changed = False
+            self._tmdb_failed = False
+            await self._async_refresh_sections()
 
-            for section_id in self._sections:
-                try:
-                    data = await self._fetch_recently_added(section_id)
-                    if data is not None:
-                        for item in data.findall(".//Video"):
-                            processed_item = await self._process_item(item)
-                            if processed_item:
-                                recently_added.append(processed_item)
+            if self._fetch_mode == PLEX_MODE_HUB:
+                items = await self._fetch_hub_items()
+            else:
+                # Fetch all sections at once, or just those a notification named
+                section_ids = [
+                    section_id for section_id in self._sections
+                    if targets is None or section_id in targets or section_id not in self._section_items
+                ]
+                sections = await asyncio.gather(
+                    *(self._fetch_section_items(section_id) for section_id in section_ids)
+                )
+                self._section_items.update(zip(section_ids, sections))
+                items = [
+                    item for section_id in self._sections
+                    for item in self._section_items.get(section_id, [])
+                ]
+
+            if not self._payload_changed:
+                _LOGGER.debug("Plex recently added unchanged, skipping update")
+                return
 
-                except Exception as section_err:
-                    _LOGGER.error("Error updating section %s: %s", section_id, section_err)
+            # Enrich items through a bounded pool
+            processed = await async_gather_bounded(
+                list(enumerate(items)), self._process_ranked, self._concurrency
+            )
+            if None in processed or self._tmdb_failed:
+                # Retry skipped or unenriched items next poll even if the
+                # payload is unchanged
+                self._payloads.clear()
+            recently_added = [item for item in processed if item]
 
             recently_added.sort(key=lambda x: x.get('release', ''), reverse=True)
             card_json.extend(recently_added[:self._max_items])
@@ -193,6 +503,7 @@ class PlexMediarrSensor(TMDBMediaSensor):
 
         except Exception as err:
             _LOGGER.error("Error updating Plex sensor: %s", err)
+            self._payloads.clear()
             self._state = 0
             self._attributes = {'data': []}
             self._available = False
@@ -204,23 +515,10 @@ class PlexMediarrSensor(TMDBMediaSensor):
             base_url = f"{config[CONF_HOST]}:{config[CONF_PORT]}"
             token = config[CONF_TOKEN]
 
-            # Fetch sections
-            url = f"{base_url}/library/sections"
-            headers = {"X-Plex-Token": token, "Accept": "application/xml"}
-            
-            async with aiohttp.ClientSession() as session:
-                async with async_timeout.timeout(10):
-                    async with session.get(url, headers=headers) as response:
-                        if response.status != 200:
-                            raise Exception(f"Error fetching library sections: {response.status}")
-                        xml_content = await response.text()
-
-            # Parse XML
-            root = ET.fromstring(xml_content)
-            sections = [directory.get("key") for directory in root.findall(".//Directory") 
-                       if directory.get("key")]
+            session = async_get_session(hass, base_url)
+            sections = await cls._fetch_sections(session, base_url, token)
 
-            return [cls(async_get_clientsession(hass), config, sections)]
+            return [cls(session, config, sections)]
 
         except Exception as error:
             _LOGGER.error("Error initializing Plex sensors: %s", error)
@@ -0,0 +1,14 @@
+"""Shared setup for the Mediarr unit tests.
+
+Requires Home Assistant to be installed:
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "custom_components"))
+
+# Home Assistant's core has to be imported before its helpers, as it is when
+# an integration is loaded
+import homeassistant.core  # noqa: E402,F401
@@ -0,0 +1,89 @@
+"""Tests for bounded gathering."""
+import asyncio
+
+from mediarr.common.concurrency import async_gather_bounded
+
+
+def test_results_keep_their_order_within_the_limit():
+    async def run():
+        running = 0
+        peak = 0
+
+        async def worker(item):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01 * (5 - item))
+            running -= 1
+            return item * 2
+
+        assert await async_gather_bounded(list(range(5)), worker, 2) == [0, 2, 4, 6, 8]
+        assert peak == 2
+
+    asyncio.run(run())
+
+
+def test_failed_items_become_none():
+    async def run():
+        async def worker(item):
+            if item == 1:
+                raise ValueError("bad item")
+            return item
+
+        assert await async_gather_bounded([0, 1, 2], worker, 3) == [0, None, 2]
+
+    asyncio.run(run())
+
+
+def test_empty_input():
+    async def run():
+        async def worker(item):
+            return item
+
+        assert await async_gather_bounded([], worker, 3) == []
+
+    asyncio.run(run())
+
+
+def test_items_past_the_deadline_are_cancelled():
+    async def run():
+        cancelled = []
+
+        async def worker(item):
+            try:
+                await asyncio.sleep(item)
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+            return item
+
+        results = await async_gather_bounded([0, 10, 0, 10], worker, 4, deadline=0.05)
+
+        assert results == [0, None, 0, None]
+        assert sorted(cancelled) == [10, 10]
+
+    asyncio.run(run())
+
+
+def test_cancelling_the_caller_cancels_running_items():
+    async def run():
+        started = asyncio.Event()
+        cancelled = []
+
+        async def worker(item):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.append(item)
+                raise
+
+        gather = asyncio.ensure_future(async_gather_bounded([0, 1], worker, 2))
+        await started.wait()
+        gather.cancel()
+        await asyncio.gather(gather, return_exceptions=True)
+        await asyncio.sleep(0)
+
+        assert sorted(cancelled) == [0, 1]
+
+    asyncio.run(run())
@@ -0,0 +1,92 @@
+"""Tests for conditional request tracking."""
+import hashlib
+
+from mediarr.common.conditional import PayloadTracker
+
+
+class FakeResponse:
+    """Response with only the status and headers the tracker reads."""
+
+    def __init__(self, status=200, headers=None):
+        self.status = status
+        self.headers = headers or {}
+
+
+VALIDATORS = {'ETag': '"v1"', 'Last-Modified': 'Sun, 18 Oct 2026 00:00:00 GMT'}
+
+
+def test_new_payload_is_changed_and_validators_are_sent_once_stored():
+    tracker = PayloadTracker()
+    assert tracker.check("key", FakeResponse(headers=VALIDATORS), b"body")
+    # Nothing was processed yet, so there is nothing to revalidate against
+    assert tracker.request_headers("key") == {}
+
+    tracker.store("key", "parsed")
+    assert tracker.request_headers("key") == {
+        'If-None-Match': '"v1"',
+        'If-Modified-Since': 'Sun, 18 Oct 2026 00:00:00 GMT',
+    }
+    assert tracker.cached("key") == "parsed"
+
+
+def test_identical_body_is_unchanged():
+    tracker = PayloadTracker()
+    tracker.check("key", FakeResponse(), b"body")
+    tracker.store("key", "parsed")
+
+    assert not tracker.check("key", FakeResponse(), b"body")
+    assert tracker.check("key", FakeResponse(), b"other body")
+
+
+def test_chunked_body_matches_the_whole_body():
+    tracker = PayloadTracker()
+    tracker.check("key", FakeResponse(), b"body")
+    tracker.store("key", "parsed")
+
+    assert not tracker.check("key", FakeResponse(), [b"bo", b"dy"])
+
+
+def test_not_modified_is_unchanged_only_with_a_stored_result():
+    tracker = PayloadTracker()
+    assert tracker.check("key", FakeResponse(304), b"")
+
+    tracker.check("key", FakeResponse(), b"body")
+    assert tracker.check("key", FakeResponse(304), b"")
+
+    tracker.store("key", "parsed")
+    assert not tracker.check("key", FakeResponse(304), b"")
+
+
+def test_unstored_payload_is_processed_again():
+    tracker = PayloadTracker()
+    tracker.check("key", FakeResponse(), b"body")
+
+    # The last update did not finish with this payload, so it is not skipped
+    assert tracker.check("key", FakeResponse(), b"body")
+
+
+def test_record_takes_a_precomputed_digest():
+    tracker = PayloadTracker()
+    digest = hashlib.sha256(b"body").hexdigest()
+    assert tracker.record("key", FakeResponse(), digest)
+    tracker.store("key", "parsed")
+
+    assert not tracker.record("key", FakeResponse(), digest)
+    assert not tracker.check("key", FakeResponse(), b"body")
+
+
+def test_forget_and_clear_drop_stored_payloads():
+    tracker = PayloadTracker()
+    for key in ("a", "b"):
+        tracker.check(key, FakeResponse(headers=VALIDATORS), b"body")
+        tracker.store(key, "parsed")
+
+    tracker.forget("a")
+    assert tracker.cached("a") is None
+    assert tracker.request_headers("a") == {}
+    assert tracker.check("a", FakeResponse(), b"body")
+    assert tracker.cached("b") == "parsed"
+
+    tracker.clear()
+    assert tracker.cached("b") is None
+    assert tracker.check("b", FakeResponse(), b"body")
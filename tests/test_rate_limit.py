@@ -0,0 +1,92 @@
+"""Tests for the priority token bucket."""
+import asyncio
+import time
+
+from mediarr.common.rate_limit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_NORMAL,
+    PRIORITY_VISIBLE,
+    RateLimiter
+)
+
+
+def test_burst_is_granted_without_waiting():
+    async def run():
+        limiter = RateLimiter(rate=1, burst=3)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.async_acquire()
+
+        assert time.monotonic() - started < 0.1
+        assert limiter.granted == 3
+        assert limiter.deferred == 0
+
+    asyncio.run(run())
+
+
+def test_waiters_are_served_by_priority_then_in_order():
+    async def run():
+        limiter = RateLimiter(rate=100, burst=1)
+        await limiter.async_acquire()
+        served = []
+
+        async def acquire(name, priority):
+            await limiter.async_acquire(priority)
+            served.append(name)
+
+        await asyncio.gather(
+            acquire("background", PRIORITY_BACKGROUND),
+            acquire("normal 1", PRIORITY_NORMAL),
+            acquire("visible", PRIORITY_VISIBLE),
+            acquire("normal 2", PRIORITY_NORMAL),
+        )
+
+        assert served == ["visible", "normal 1", "normal 2", "background"]
+        assert limiter.deferred == 4
+
+    asyncio.run(run())
+
+
+def test_backoff_holds_every_caller_back():
+    async def run():
+        limiter = RateLimiter(rate=100, burst=5)
+        limiter.backoff(0.2)
+        assert limiter.stats['blocked_for'] > 0
+
+        started = time.monotonic()
+        await limiter.async_acquire()
+
+        assert time.monotonic() - started >= 0.2
+        assert limiter.throttled == 1
+
+    asyncio.run(run())
+
+
+def test_backoff_spends_the_burst():
+    async def run():
+        limiter = RateLimiter(rate=20, burst=5)
+        limiter.backoff(0)
+        started = time.monotonic()
+        for _ in range(3):
+            await limiter.async_acquire()
+
+        # Tokens come back at the refill rate instead of as a full burst
+        assert time.monotonic() - started >= 0.1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_is_skipped():
+    async def run():
+        limiter = RateLimiter(rate=20, burst=1)
+        await limiter.async_acquire()
+
+        cancelled = asyncio.ensure_future(limiter.async_acquire(PRIORITY_VISIBLE))
+        waiting = asyncio.ensure_future(limiter.async_acquire(PRIORITY_BACKGROUND))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+
+        await asyncio.wait_for(waiting, 1)
+        assert limiter.stats['waiting'] == 0
+
+    asyncio.run(run())
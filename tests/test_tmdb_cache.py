@@ -0,0 +1,161 @@
+"""Tests for the shared TMDB cache."""
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from mediarr.common import tmdb_cache
+from mediarr.common.tmdb_cache import TMDBCache
+
+
+class FakeClock:
+    """Stand-in for the time module with a settable wall clock."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tmdb_cache, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = TMDBCache()
+    cache.set("details_movie_1", "value", timedelta(seconds=60))
+
+    clock.now += 59
+    assert cache.get("details_movie_1") == "value"
+
+    clock.now += 1
+    assert cache.get("details_movie_1", "default") == "default"
+    assert len(cache) == 0
+    assert cache.expirations == 1
+
+
+def test_entries_without_ttl_never_expire(clock):
+    cache = TMDBCache()
+    cache.set("genres_movie", "value")
+
+    clock.now += 10 ** 9
+    assert cache.get("genres_movie") == "value"
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = TMDBCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_get_counts_hits_and_misses(clock):
+    cache = TMDBCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    assert cache.stats['hits'] == 1
+    assert cache.stats['misses'] == 1
+    assert cache.stats['hit_ratio'] == 0.5
+
+
+def test_concurrent_callers_share_one_fetch():
+    async def run():
+        cache = TMDBCache()
+        release = asyncio.Event()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "value"
+
+        callers = [asyncio.ensure_future(cache.async_get_or_fetch("key", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers)
+
+        assert results == ["value"] * 3
+        assert calls == 1
+        assert cache.misses == 1
+        assert cache.coalesced == 2
+        assert await cache.async_get_or_fetch("key", fetch) == "value"
+        assert calls == 1
+        assert cache.hits == 1
+
+    asyncio.run(run())
+
+
+def test_none_results_are_fetched_again():
+    async def run():
+        cache = TMDBCache()
+        calls = 0
+
+        async def fetch():
+            nonlocal calls
+            calls += 1
+            return None
+
+        assert await cache.async_get_or_fetch("key", fetch) is None
+        assert await cache.async_get_or_fetch("key", fetch) is None
+        assert calls == 2
+        assert len(cache) == 0
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_is_raised_to_every_caller_and_retried():
+    async def run():
+        cache = TMDBCache()
+        release = asyncio.Event()
+
+        async def failing():
+            await release.wait()
+            raise RuntimeError("TMDB unavailable")
+
+        callers = [asyncio.ensure_future(cache.async_get_or_fetch("key", failing)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*callers, return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+
+        async def succeeding():
+            return "value"
+
+        assert await cache.async_get_or_fetch("key", succeeding) == "value"
+
+    asyncio.run(run())
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_fetch():
+    async def run():
+        cache = TMDBCache()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return "value"
+
+        first = asyncio.ensure_future(cache.async_get_or_fetch("key", fetch))
+        second = asyncio.ensure_future(cache.async_get_or_fetch("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "value"
+        assert first.cancelled()
+        assert cache.get("key") == "value"
+
+    asyncio.run(run())